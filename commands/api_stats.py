@@ -0,0 +1,27 @@
+import discord
+from discord import app_commands
+
+from utils.cache import api_cache
+from utils.key_pool import key_pool
+from utils.rendering import chart_cache
+
+
+@app_commands.command(name="api_stats", description="Show Torn API cache hit rate and per-key request usage.")
+async def api_stats(interaction: discord.Interaction):
+    stats = api_cache.stats()
+    usage = key_pool.stats()
+
+    msg = (
+        f"🗄️ **API cache**: {stats['entries']} entries | "
+        f"{stats['hits']} hits, {stats['coalesced']} coalesced, {stats['misses']} misses "
+        f"({stats['hit_rate']:.0%} served without a new request)\n"
+        f"🔑 **Key usage (last 60s, limit {key_pool.limit}):**\n"
+    )
+    msg += "\n".join(f"- {purpose}: {used}" for purpose, used in usage.items()) or "- No keys configured"
+
+    charts = chart_cache.stats()
+    msg += (
+        f"\n🖼️ **Chart cache**: {charts['entries']} images ({charts['bytes'] / 1024:,.0f} KiB) | "
+        f"{charts['hit_rate']:.0%} served without rendering"
+    )
+    await interaction.response.send_message(msg, ephemeral=True)
@@ -1,7 +1,9 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-from utils.bank import update_balance, get_balance, get_all_balances
+from datetime import datetime, timezone
+from typing import Optional
+from utils.bank import update_balance, get_balance, get_all_balances, get_statement, STATEMENT_PAGE_SIZE
 
 YOUR_DISCORD_USER_ID = 521438347705450507  # Replace with your Discord ID
 
@@ -19,8 +21,7 @@ async def deposit(interaction: discord.Interaction, user: discord.User, amount:
         await interaction.response.send_message("❌ Amount must be positive.", ephemeral=True)
         return
 
-    update_balance(user.id, amount)
-    balance = get_balance(user.id)
+    balance = update_balance(user.id, amount, kind="deposit", actor_id=interaction.user.id)
     await interaction.response.send_message(
         f"💰 Deposited {amount:n} T$ for {user.mention}. New balance: {balance:n} T$"
     )
@@ -40,8 +41,7 @@ async def withdraw(interaction: discord.Interaction, user: discord.User, amount:
         return
 
     # Allow negative balances for loans
-    update_balance(user.id, -amount)
-    new_balance = get_balance(user.id)
+    new_balance = update_balance(user.id, -amount, kind="withdraw", actor_id=interaction.user.id)
     emoji = "🏧" if new_balance >= 0 else "💸"
     await interaction.response.send_message(
         f"{emoji} Withdrew {amount:n} T$ from {user.mention}. New balance: {new_balance:n} T$"
@@ -88,11 +88,42 @@ async def bank_adjust(interaction: discord.Interaction, user: discord.User, amou
         await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
         return
 
-    from utils.bank import update_balance, get_balance
-    update_balance(user.id, amount)
-    new_balance = get_balance(user.id)
+    new_balance = update_balance(user.id, amount, kind="adjust", actor_id=interaction.user.id)
 
     verb = "credited" if amount >= 0 else "debited"
     await interaction.response.send_message(
         f"🛠️ {verb.capitalize()} {abs(amount):n} T$ for {user.mention}. New balance: {new_balance:n} T$"
     )
+
+
+@app_commands.command(name="bank_history", description="View Bank of Seb transactions, newest first")
+@app_commands.describe(user="Whose history to view (only the banker can view others)", page="Page number, default 1")
+async def bank_history(interaction: discord.Interaction, user: Optional[discord.User] = None,
+                       page: app_commands.Range[int, 1, 10000] = 1):
+    target = user or interaction.user
+    if target.id != interaction.user.id and interaction.user.id != YOUR_DISCORD_USER_ID:
+        await interaction.response.send_message("❌ You can only view your own history.", ephemeral=True)
+        return
+
+    entries, total = get_statement(target.id, page=page)
+    pages = (total + STATEMENT_PAGE_SIZE - 1) // STATEMENT_PAGE_SIZE
+    if not total:
+        await interaction.response.send_message(f"📄 {target.mention} has no transactions yet.", ephemeral=True)
+        return
+    if not entries:
+        await interaction.response.send_message(
+            f"📄 Page {page} is past the end; {target.mention} has {pages} page{'s' if pages != 1 else ''} of history.",
+            ephemeral=True
+        )
+        return
+    lines = []
+    for entry in entries:
+        when = datetime.fromtimestamp(entry["created_at"], tz=timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+        lines.append(
+            f"`#{entry['id']}` {when} | {entry['kind']} {entry['amount']:+n} T$ → {entry['balance_after']:n} T$"
+        )
+
+    await interaction.response.send_message(
+        f"🧾 **Bank of Seb history for {target.mention}** (page {page}/{pages}):\n" + "\n".join(lines),
+        ephemeral=True
+    )
@@ -1,10 +1,10 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-from datetime import datetime, timezone
 from utils.happy_insurance import load_last_timestamp
 from utils.happy_insurance import get_active_insurance_logs
 from utils.happy_insurance import get_recent_insurance_logs
+from utils.happy_insurance import format_utc
 
 @app_commands.command(name="view_insurance_timestamp", description="View last checked insurance payment timestamp.")
 async def view_insurance_timestamp(interaction: discord.Interaction):
@@ -20,8 +20,8 @@ async def view_active_insurance(interaction: discord.Interaction):
 
     msg = "**🛡️ Active Happy Insurance Covers:**\n"
     for log in active:
-        dt = datetime.fromtimestamp(log["timestamp"], tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-        end_dt = datetime.fromisoformat(log["coverage_end"]).strftime("%Y-%m-%d %H:%M:%S UTC")
+        dt = format_utc(log["timestamp"])
+        end_dt = format_utc(log["coverage_end"])
         msg += f"👤 {log['sender_id']} | 🕒 {dt} - {end_dt} | 📝 {log['message'] or '(no message)'}\n"
 
     await interaction.response.send_message(msg, ephemeral=True)
@@ -36,8 +36,8 @@ async def view_insurance_log(interaction: discord.Interaction, hours: int = 24):
 
     msg = f"**🗓️ Insurance payments in the last {hours} hour(s):**\n"
     for log in recent:
-        dt = datetime.fromtimestamp(log["timestamp"], tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-        end_dt = datetime.fromisoformat(log["coverage_end"]).strftime("%Y-%m-%d %H:%M:%S UTC")
+        dt = format_utc(log["timestamp"])
+        end_dt = format_utc(log["coverage_end"])
         msg += f"👤 {log['sender_id']} | 🕒 {dt} - {end_dt} | 📝 {log['message'] or '(no message)'}\n"
 
     await interaction.response.send_message(msg, ephemeral=True)
\ No newline at end of file
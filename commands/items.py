@@ -1,12 +1,14 @@
 
 import discord
 import os
-import requests
 from discord import app_commands, Interaction, File
-from utils.items import fetch_item_market_price
+from constants import MARKET_POLL_SECONDS
+from utils.market_feed import market_feed
 from utils.normalise import normalise_item_name
 from utils.charts import generate_item_price_graph
-from utils.history import load_item_price_history
+from utils.history import get_price_history
+from utils.rollups import series_stats
+from utils.rendering import render, price_trend_png, RenderError
 from utils.tracked_items import (
     add_tracked_item,
     remove_tracked_item,
@@ -14,7 +16,6 @@ from utils.tracked_items import (
     update_item_threshold
 )
 from typing import Optional
-import matplotlib.pyplot as plt
 from io import BytesIO
 
 @app_commands.command(name="set_item_threshold", description="Set buy and/or sell thresholds for a tracked item")
@@ -66,23 +67,36 @@ async def check_item_price(interaction: Interaction, item: str):
         return
 
     item_id = data[normalised]["item_id"]
-    price, quantity = fetch_item_market_price(item_id)
+    # Served from the market feed's latest snapshot when it is fresh
+    snapshot = market_feed.latest(normalised, max_age=MARKET_POLL_SECONDS * 2)
+    respond = interaction.response.send_message
+
+    if snapshot is None:
+        # Stale: fetching may wait on the API or the key pool, so answer the interaction first
+        await interaction.response.defer()
+        respond = interaction.followup.send
+        try:
+            snapshot = await market_feed.get(normalised, item_id)
+        except Exception as e:
+            print(f"❌ Error fetching item market price: {e}")
+            await respond(f"❌ Could not fetch the market price for **{item.title()}**, try again shortly.")
+            return
 
-    if price is None:
-        await interaction.response.send_message(f"⚠️ No listings for **{item.title()}**", ephemeral=True)
+    if snapshot.price is None:
+        await respond(f"⚠️ No listings for **{item.title()}**")
         return
 
-    await interaction.response.send_message(
-        f"📦 **{item.title()}** lowest market price: **{price:n}** T$ for {quantity} units"
+    await respond(
+        f"📦 **{item.title()}** lowest market price: **{snapshot.price:n}** T$ for {snapshot.quantity} units "
+        f"(updated {int(snapshot.age)}s ago)"
     )
 
-@app_commands.command(name="item_price_graph", description="Show a price trend graph for a tracked item over the last week")
-@app_commands.describe(item="Name of the item to graph (e.g., Xanax)")
-async def item_price_graph(interaction: Interaction, item: str):
+@app_commands.command(name="item_price_graph", description="Show a price trend graph for a tracked item")
+@app_commands.describe(item="Name of the item to graph (e.g., Xanax)", days="How many days back to graph (default 7, up to 365)")
+async def item_price_graph(interaction: Interaction, item: str, days: app_commands.Range[int, 1, 365] = 7):
     try:
-        print(f"📈 Received /item_price_graph for item: {item}")
+        print(f"📈 Received /item_price_graph for item: {item} ({days}d)")
         tracked_items = load_combined_items_data()
-        history_data = load_item_price_history()
 
         normalised = normalise_item_name(item)
         if normalised not in tracked_items:
@@ -92,38 +106,40 @@ async def item_price_graph(interaction: Interaction, item: str):
             )
             return
 
-        price_history = history_data.get(normalised, [])
-        if not price_history:
+        # 5m, 1h or 1d candles depending on how far back the graph goes
+        series = get_price_history(normalised, days)
+        if series["close"].size == 0:
             await interaction.response.send_message(
                 f"⚠️ No price history available for **{item.title()}**", ephemeral=True
             )
             return
 
-        timestamps = [entry["timestamp"] for entry in price_history]
-        prices = [entry["price"] for entry in price_history]
-
-        plt.figure()
-        plt.plot(timestamps, prices, marker="o")
-        plt.title(f"Price Trend for {item.title()}")
-        plt.xlabel("Timestamp")
-        plt.ylabel("Price (T$)")
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-
-        buf = BytesIO()
-        plt.savefig(buf, format="png")
-        buf.seek(0)
-        plt.close()
+        await interaction.response.defer()
+        stats = series_stats(series)
+        band = (series["low"], series["high"]) if series["resolution"] else (None, None)
+        png = await render(
+            price_trend_png, f"Price Trend for {item.title()}",
+            series["timestamp"], series["close"], *band
+        )
 
-        file = File(fp=buf, filename="item_price_graph.png")
-        await interaction.response.send_message(
-            content=f"📊 Price trend for **{item.title()}** over the past week:",
+        file = File(fp=BytesIO(png), filename="item_price_graph.png")
+        await interaction.followup.send(
+            content=(
+                f"📊 Price trend for **{item.title()}** over the past {days} day(s):\n"
+                f"Low {stats['min']:n} | High {stats['max']:n} | Avg {stats['mean']:,.0f} | "
+                f"Last {stats['last']:n} T$ ({stats['count']} samples)"
+            ),
             file=file
         )
 
+    except RenderError as e:
+        await interaction.followup.send(f"⚠️ {e}", ephemeral=True)
     except Exception as e:
         print(f"❌ Error in /item_price_graph: {e}")
-        await interaction.response.send_message("❌ An error occurred while generating the graph.", ephemeral=True)
+        if interaction.response.is_done():
+            await interaction.followup.send("❌ An error occurred while generating the graph.", ephemeral=True)
+        else:
+            await interaction.response.send_message("❌ An error occurred while generating the graph.", ephemeral=True)
 
 @app_commands.command(name="add_tracked_item", description="Add a new item to track, with optional buy/sell thresholds")
 @app_commands.describe(
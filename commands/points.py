@@ -21,5 +21,5 @@ async def set_points_sell(interaction: discord.Interaction, threshold: int):
 
 @app_commands.command(name="check_points_price", description="Check the current market price of points.")
 async def check_points_price(interaction: discord.Interaction):
-    current_price = prices.get_points_price()
+    current_price = await prices.get_points_price()
     await interaction.response.send_message(f"Current points market price is ${current_price:,} per point.")
@@ -1,28 +1,41 @@
 from discord.ext import tasks
-from utils.trains_tracker import update_received_trains_from_logs
+from utils.log_ingester import register_log_handler, ingest_new_logs, backfill_logs
+from utils.trains_tracker import record_train_receipts
 from utils.happy_insurance import (
     check_xanax_insurance, load_last_timestamp, save_last_timestamp,
     save_insurance_logs, post_insurance_to_channel
 )
 
 def start_train_log_checker(bot):
-    @tasks.loop(minutes=5)
-    async def check_logs():
-        print("🔄 Checking for new train logs...")
-        update_received_trains_from_logs()
-
-        print("🔄 Checking for new happy insurance logs...")
-        last_ts = load_last_timestamp()
-        new_payments = check_xanax_insurance(last_ts)
+    async def record_insurance_payments(entries):
+        new_payments = check_xanax_insurance(entries)
 
         if new_payments:
+            # Only seeds the log cursor on a fresh start; the ingester does the deduping
             latest_ts = max(p["timestamp"] for p in new_payments)
-            save_last_timestamp(latest_ts)
+            save_last_timestamp(max(latest_ts, load_last_timestamp()))
             save_insurance_logs(new_payments)
 
             for payment in new_payments:
-                await post_insurance_to_channel(bot, payment)
+                post_insurance_to_channel(payment)
         else:
             print("ℹ️ No new happy insurance payments.")
 
-    check_logs.start()
\ No newline at end of file
+    # One log fetch per cycle feeds both trackers
+    register_log_handler("Company train receive", record_train_receipts)
+    register_log_handler("Item receive", record_insurance_payments)
+
+    @tasks.loop(minutes=5)
+    async def check_logs():
+        print("🔄 Checking for new train and happy insurance logs...")
+        try:
+            if check_logs.current_loop == 0:
+                # First run after a restart: page back to the cursor so downtime isn't lost
+                count = await backfill_logs()
+            else:
+                count = await ingest_new_logs()
+            print(f"ℹ️ Processed {count} new log entries.")
+        except Exception as e:
+            print(f"❌ Error fetching logs from Torn API: {e}")
+
+    check_logs.start()
@@ -0,0 +1,49 @@
+import discord
+from discord import app_commands
+from datetime import datetime, timezone
+
+from utils.war_archive import list_wars, get_war
+
+
+def _war_line(war: dict) -> str:
+    when = datetime.fromtimestamp(war["last_timestamp"], tz=timezone.utc).strftime("%Y-%m-%d")
+    return (
+        f"⚔️ **{war['war_id']}** — {war['your_faction'] or '?'} vs {war['enemy_faction'] or '?'} ({when}) | "
+        f"hour {war['last_hour']:.1f} | lead {war['lead']:n} | {war['samples']} samples"
+    )
+
+
+@app_commands.command(name="war_list", description="List recently recorded wars.")
+@app_commands.describe(count="How many wars to show (default 10).")
+async def war_list(interaction: discord.Interaction, count: app_commands.Range[int, 1, 25] = 10):
+    wars = list_wars(count)
+    if not wars:
+        await interaction.response.send_message("ℹ️ No wars have been recorded yet.", ephemeral=True)
+        return
+
+    msg = "**📜 Recorded Wars:**\n" + "\n".join(_war_line(war) for war in wars)
+    await interaction.response.send_message(msg, ephemeral=True)
+
+
+@app_commands.command(name="war_compare", description="Compare two recorded wars side by side.")
+@app_commands.describe(first_war_id="War ID (see /war_list)", second_war_id="Another war ID")
+async def war_compare(interaction: discord.Interaction, first_war_id: int, second_war_id: int):
+    wars = [get_war(first_war_id), get_war(second_war_id)]
+    missing = [str(war_id) for war_id, war in zip((first_war_id, second_war_id), wars) if war is None]
+    if missing:
+        await interaction.response.send_message(f"❌ Not in the archive: {', '.join(missing)}", ephemeral=True)
+        return
+
+    rows = [
+        ("Opponent", lambda w: w["enemy_faction"] or "?"),
+        ("Starting goal", lambda w: f"{w['starting_goal']:n}" if w["starting_goal"] else "?"),
+        ("Last hour seen", lambda w: f"{w['last_hour']:.1f}"),
+        ("Our score", lambda w: f"{w['your_score']:n}"),
+        ("Lead", lambda w: f"{w['lead']:n}"),
+        ("Lead range", lambda w: f"{w['min_lead']:n} to {w['max_lead']:n}"),
+        ("Last predicted end", lambda w: f"hour {w['predicted_end']:.1f}" if w["predicted_end"] is not None else "—"),
+        ("Samples", lambda w: f"{w['samples']}"),
+    ]
+    msg = f"**⚖️ War {first_war_id} vs War {second_war_id}**\n"
+    msg += "\n".join(f"{label}: **{fmt(wars[0])}** | **{fmt(wars[1])}**" for label, fmt in rows)
+    await interaction.response.send_message(msg, ephemeral=True)
@@ -1,17 +1,24 @@
 import discord
 from discord import app_commands
-import numpy as np
-import matplotlib.pyplot as plt
 from io import BytesIO
 import time
 import math
+import asyncio
+from typing import Optional
 
 from utils.predictor import (
     predict_war_end,
     fetch_v2_war_data,
     log_war_data,
-    estimate_win_time_if_no_more_hits
+    estimate_win_time_if_no_more_hits,
+    decayed_target,
+    load_war_log,
+    war_whatif_grid
 )
+from utils.rendering import render, war_prediction_png, war_fan_png, war_whatif_png
+from utils.war_sim import estimate_scoring_rates, simulate_war
+from utils.war_tracker import war_tracker
+from constants import WAR_SIM_PATHS, WAR_SIM_BUDGET
 
 @app_commands.command(name="warpredict", description="Predict war outcome from manual inputs.")
 @app_commands.describe(
@@ -57,18 +64,30 @@ async def autopredict(interaction: discord.Interaction, starting_goal: int):
     await interaction.response.defer(thinking=True)
 
     try:
-        data = fetch_v2_war_data()
-        current_hour = data["current_hour"]
-        decay_hours = max(0, math.floor(current_hour - 24))
-        data["starting_goal"] = starting_goal
-
-        result = predict_war_end(
-            data["current_hour"],
-            data["current_lead"],
-            data["your_score"],
-            starting_goal
-        )
-        log_war_data(data, result)
+        if war_tracker.fresh:
+            # The background tracker already has this minute's war state and scoring rates
+            data = dict(war_tracker.data, current_hour=round(war_tracker.hour, 1), starting_goal=starting_goal)
+            result = war_tracker.predict(starting_goal)
+            if result["war_end_hour"] == float("inf"):
+                raise ValueError("❌ Could not estimate war end — progress too slow.")
+            lead_gain_per_hour = result["your_rate"] - result["opponent_rate"]
+            source = f"live tracker, updated {war_tracker.age:.0f}s ago"
+        else:
+            # Several members often run this together; a minute-old war snapshot is fine
+            data = await fetch_v2_war_data(max_age=60)
+            data["starting_goal"] = starting_goal
+
+            result = predict_war_end(
+                data["current_hour"],
+                data["current_lead"],
+                data["your_score"],
+                starting_goal
+            )
+            log_war_data(data, result)
+            lead_gain_per_hour = data["current_lead"] / data["current_hour"]
+            source = "war average so far"
+
+        decay_hours = max(0, math.floor(data["current_hour"] - 24))
 
         # Compute current decayed target
         current_target = round(starting_goal * (0.99 ** decay_hours))
@@ -81,26 +100,13 @@ async def autopredict(interaction: discord.Interaction, starting_goal: int):
         )
 
         # Plotting
+        import numpy as np  # heavy; only loaded once a prediction is asked for
         hours = np.arange(data["current_hour"], result["war_end_hour"] + 1, 0.5)
-        lead_gain_per_hour = data["current_lead"] / data["current_hour"]
         lead_values = data["current_lead"] + lead_gain_per_hour * (hours - data["current_hour"])
-        target_values = starting_goal * (0.99 ** (hours - 24))
-
-        fig, ax = plt.subplots()
-        ax.plot(hours, lead_values, label="Your Lead")
-        ax.plot(hours, target_values, label="Target", linestyle="--")
-        ax.axvline(result["war_end_hour"], color="red", linestyle=":", label="Predicted End")
-        ax.set_title("Lead vs. Decaying Target")
-        ax.set_xlabel("War Hour")
-        ax.set_ylabel("Points")
-        ax.legend()
-        ax.grid(True)
-
-        buf = BytesIO()
-        plt.savefig(buf, format="png")
-        buf.seek(0)
-        file = discord.File(fp=buf, filename="prediction_chart.png")
-        plt.close()
+        target_values = decayed_target(starting_goal, hours)
+
+        png = await render(war_prediction_png, hours, lead_values, target_values, result["war_end_hour"])
+        file = discord.File(fp=BytesIO(png), filename="prediction_chart.png")
 
         await interaction.followup.send(
             content=(
@@ -109,6 +115,7 @@ async def autopredict(interaction: discord.Interaction, starting_goal: int):
                 f"📊 Current Score: **{data['your_score']}** | Lead: **{data['current_lead']}**\n"
                 f"🎯 Current Target: **{current_target}**\n"
                 f"📅 Predicted End at hour **{result['war_end_hour']}** (i.e. in {result['hours_remaining']}h)\n"
+                f"📈 Lead trend: **{lead_gain_per_hour:+.0f}/h** ({source})\n"
                 f"🏁 Final Score Estimate:\n"
                 f" \nYou: **{result['your_final_score']}**\n"
                 f"Opponent: **{result['opponent_final_score']}**\n"
@@ -119,3 +126,127 @@ async def autopredict(interaction: discord.Interaction, starting_goal: int):
 
     except Exception as e:
         await interaction.followup.send(f"❌ Error: {e}")
+
+
+@app_commands.command(name="warsimulate", description="Monte Carlo war outcome: win chance, end time range and a fan chart.")
+@app_commands.describe(
+    starting_goal="The original target score (e.g. 7600) — required.",
+    paths="How many futures to simulate (default 20000)."
+)
+async def warsimulate(interaction: discord.Interaction, starting_goal: int, paths: app_commands.Range[int, 1000, 100000] = WAR_SIM_PATHS):
+    await interaction.response.defer(thinking=True)
+
+    try:
+        data = await fetch_v2_war_data(max_age=60)
+        opponent_score = data["your_score"] - data["current_lead"]
+        war_log = load_war_log(data["war_id"])
+        rates = estimate_scoring_rates(
+            war_log["history"] if war_log else None, data["current_hour"], data["your_score"], opponent_score
+        )
+
+        # CPU-bound; run it off the event loop, and stop waiting if it badly overruns its budget
+        loop = asyncio.get_running_loop()
+        result = await asyncio.wait_for(
+            loop.run_in_executor(
+                None, simulate_war, data["current_hour"], data["your_score"], opponent_score, starting_goal, rates, paths
+            ),
+            WAR_SIM_BUDGET * 3
+        )
+
+        if not result["resolved"]:
+            await interaction.followup.send("❌ None of the simulated wars finished — scoring is too slow to call.")
+            return
+
+        ends = result["end_hour_percentiles"]
+        current_hour = data["current_hour"]
+        png = await render(war_fan_png, result["fan_hours"], result["fan"], decayed_target(starting_goal, result["fan_hours"]))
+
+        msg = (
+            f"🎲 **Monte Carlo War Simulation** ({result['resolved']:,} of {result['paths']:,} paths finished "
+            f"in {result['elapsed']:.1f}s{', budget reached' if result['truncated'] else ''})\n"
+            f"🏆 Win probability: **{result['win_probability']:.1%}**\n"
+            f"📅 War ends at hour **{ends[50]:.1f}** (in {ends[50] - current_hour:.1f}h)\n"
+            f"↔️ 50% range: hour {ends[25]:.1f} – {ends[75]:.1f} | 90% range: hour {ends[5]:.1f} – {ends[95]:.1f}\n"
+            f"📈 Rates/hour — You: {rates['your_mean']:.0f} ± {rates['your_sd']:.0f} | "
+            f"Opponent: {rates['opponent_mean']:.0f} ± {rates['opponent_sd']:.0f} (from {rates['source']})"
+        )
+        await interaction.followup.send(content=msg, file=discord.File(fp=BytesIO(png), filename="war_simulation.png"))
+
+    except Exception as e:
+        await interaction.followup.send(f"❌ Error: {e}")
+
+
+def _whatif_sweep(current_hour, current_lead, starting_goal, your_rates, opponent_rates, opponent_now, by_hour):
+    """The full grid, plus the lowest rate of ours that wins by `by_hour` if the opponent keeps their pace."""
+    import numpy as np
+
+    grid = war_whatif_grid(current_hour, current_lead, starting_goal, your_rates, opponent_rates)
+    needed = None
+    if by_hour is not None:
+        line = war_whatif_grid(current_hour, current_lead, starting_goal, your_rates, [opponent_now])
+        wins = (line["final_lead"][:, 0] > 0) & (line["end_hour"][:, 0] <= by_hour)
+        if wins.any():
+            needed = float(your_rates[np.argmax(wins)])
+    return grid, needed
+
+
+@app_commands.command(name="war_whatif", description="Heatmap of war end time and outcome over a grid of scoring rates.")
+@app_commands.describe(
+    starting_goal="The original target score (e.g. 7600) — required.",
+    by_hour="Optional: find the rate we need to win by this war hour.",
+    max_rate="Highest points/hour on each axis (default: about twice the current pace).",
+    steps="Rates per axis (default 200)."
+)
+async def war_whatif(interaction: discord.Interaction, starting_goal: int, by_hour: Optional[float] = None,
+                     max_rate: Optional[app_commands.Range[int, 10, 100000]] = None,
+                     steps: app_commands.Range[int, 20, 400] = 200):
+    await interaction.response.defer(thinking=True)
+
+    try:
+        if war_tracker.fresh:
+            data = war_tracker.data
+            current_hour = war_tracker.hour
+            rates = war_tracker.lead_rates()
+            your_now, opponent_now = rates["your"], rates["opponent"]
+        else:
+            data = await fetch_v2_war_data(max_age=60)
+            current_hour = data["current_hour"]
+            hours = max(current_hour, 1)
+            your_now = data["your_score"] / hours
+            opponent_now = (data["your_score"] - data["current_lead"]) / hours
+
+        import numpy as np
+
+        top = max_rate or max(100, math.ceil(2 * max(your_now, opponent_now) / 50) * 50)
+        rates_axis = np.linspace(0, top, steps)
+
+        # Hundreds x hundreds of scenarios: solve off the event loop, then render in the chart pool
+        loop = asyncio.get_running_loop()
+        grid, needed = await loop.run_in_executor(
+            None, _whatif_sweep, current_hour, data["current_lead"], starting_goal,
+            rates_axis, rates_axis, opponent_now, by_hour
+        )
+        png = await render(
+            war_whatif_png, rates_axis, rates_axis, grid["end_hour"], grid["final_lead"],
+            current_rates=(your_now, opponent_now), by_hour=by_hour
+        )
+
+        wins = np.count_nonzero(grid["final_lead"] > 0)
+        msg = (
+            f"🧮 **War What-If** ({steps}×{steps} rate pairs, 0–{top:n} points/hour)\n"
+            f"🕓 Hour **{current_hour:.1f}** | Lead **{data['current_lead']:n}** | "
+            f"Current pace — You: {your_now:.0f}/h | Opponent: {opponent_now:.0f}/h\n"
+            f"🏆 We win in **{wins / grid['final_lead'].size:.0%}** of the scenarios"
+        )
+        if by_hour is not None:
+            if by_hour <= current_hour:
+                msg += f"\n⚠️ Hour {by_hour:g} has already passed."
+            elif needed is None:
+                msg += f"\n❌ Even {top:n}/h doesn't win by hour {by_hour:g} if the opponent keeps {opponent_now:.0f}/h."
+            else:
+                msg += f"\n🎯 To win by hour **{by_hour:g}** against {opponent_now:.0f}/h we need **{needed:.0f}/h**."
+
+        await interaction.followup.send(content=msg, file=discord.File(fp=BytesIO(png), filename="war_whatif.png"))
+
+    except Exception as e:
+        await interaction.followup.send(f"❌ Error: {e}")
@@ -10,16 +10,49 @@ API_KEYS = {
     "default": os.getenv("TORN_API_KEY")
 }
 
+# Torn allows 100 requests per minute per key; keep some headroom for manual use
+API_KEY_REQUESTS_PER_MINUTE = int(os.getenv("API_KEY_REQUESTS_PER_MINUTE", "90"))
+
 GUILD_ID = 1344056482668478557
+DATABASE_FILE = "/mnt/data/tfl_war_bot.db"
 THRESHOLDS_FILE = "/mnt/data/point_thresholds.json"
 POINT_HISTORY_FILE = "/mnt/data/point_price_history.json"
+POINT_LOG_DIR = "/mnt/data/point_price_log"
 ITEM_ALERTS_FILE = "/mnt/data/item_price_alerts.json"
 ITEM_HISTORY_FILE = "/mnt/data/item_price_history.json"
+ITEM_HISTORY_DIR = "/mnt/data/item_price_columns"
 ITEM_THRESHOLD_FILE = "/mnt/data/item_thresholds.json"
 DEFAULT_COMBINED_ITEMS_FILE = "data/default_combined_items.json"
 MOUNTED_COMBINED_ITEMS_FILE = "/mnt/data/combined_tracked_items.json"
 POINTS_SILENT_CHECKS = 0
 
+# How often the shared market feed polls every tracked item (seconds)
+MARKET_POLL_SECONDS = 20
+
+# Item market fan-out: max in-flight requests and per-request deadline (seconds)
+ITEM_FETCH_CONCURRENCY = int(os.getenv("ITEM_FETCH_CONCURRENCY", "8"))
+ITEM_FETCH_TIMEOUT = float(os.getenv("ITEM_FETCH_TIMEOUT", "8"))
+
+# Chart rendering runs in worker processes, off the event loop
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+RENDER_QUEUE_LIMIT = int(os.getenv("RENDER_QUEUE_LIMIT", "8"))
+RENDER_TIMEOUT = float(os.getenv("RENDER_TIMEOUT", "20"))
+CHART_CACHE_BYTES = int(os.getenv("CHART_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+# Outbound alerts: queue flush interval and how long a repeated alert stays suppressed (seconds)
+OUTBOX_FLUSH_SECONDS = float(os.getenv("OUTBOX_FLUSH_SECONDS", "2"))
+OUTBOX_COOLDOWN = float(os.getenv("OUTBOX_COOLDOWN", "600"))
+
+# Live war tracker: sampling interval (seconds), rate smoothing and window (hours), status channel
+WAR_POLL_SECONDS = int(os.getenv("WAR_POLL_SECONDS", "60"))
+WAR_RATE_HALF_LIFE = float(os.getenv("WAR_RATE_HALF_LIFE", "1"))
+WAR_RATE_WINDOW = float(os.getenv("WAR_RATE_WINDOW", "1"))
+WAR_STATUS_CHANNEL = os.getenv("WAR_STATUS_CHANNEL", "war-room")
+
+# Monte Carlo war simulation: default path count and wall-clock budget (seconds)
+WAR_SIM_PATHS = int(os.getenv("WAR_SIM_PATHS", "20000"))
+WAR_SIM_BUDGET = float(os.getenv("WAR_SIM_BUDGET", "3"))
+
 
 # from constants import API_KEYS
 
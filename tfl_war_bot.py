@@ -1,89 +1,136 @@
+import time
+STARTUP_STARTED = time.perf_counter()
+
 import os
+import json
+import hashlib
 import discord
-import asyncio
 from discord.ext import commands
 from constants import GUILD_ID, ITEM_THRESHOLD_FILE
 
 # Import all slash commands
-from commands.warpredict import warpredict, autopredict
+from commands.warpredict import warpredict, autopredict, warsimulate, war_whatif
 from commands.perks import check_gear_perk, list_gear_perks, check_job_perk, list_jobs, list_job_perks
 from commands.points import set_points_buy, set_points_sell, check_points_price
 from commands.items import check_item_price, item_price_graph, add_tracked_item_command, remove_tracked_item_command, list_tracked_items_command, set_item_threshold
-from commands.bank import deposit, withdraw, check_statement, loan_summary, bank_adjust
+from commands.bank import deposit, withdraw, check_statement, loan_summary, bank_adjust, bank_history
 from commands.trains_tracker import set_trains_data_command, view_trains_data, add_received_trains
 from commands.trains_auto_checker import start_train_log_checker
 from commands.happy_insurance import view_insurance_timestamp, view_active_insurance, view_insurance_log
 from commands.check_shoplifting_alerts import check_shoplifting_alerts
+from commands.api_stats import api_stats
+from commands.war_history import war_list, war_compare
 
 # Import utility functions and background tasks
 from utils.thresholds import post_threshold_summary
 from utils.charts import post_hourly_point_graph
 from utils.tracked_items import initialise_combined_tracked_file
-from utils.bank import initialise_bank_file
-from utils.trains_tracker import initialise_train_file
-from utils.happy_insurance import initialise_happy_insurance_file, _initialise_log_file
+from utils.storage import initialise_database, get_setting, set_setting
+from utils.bank import initialise_bank_ledger
+from utils.rollups import initialise_rollups
 from utils.check_loops import start_loops  # This will start all loops and inject bot
 from utils.shoplifting import monitor_shoplifting
+from utils.war_tracker import war_tracker_loop
+from utils.torn_api import close_session
+from utils.rendering import start_renderer, shutdown_renderer
+from utils.outbox import outbox
+
+
+IMPORTS_DONE = time.perf_counter()
+
+GUILD_COMMANDS = [
+    warpredict, autopredict, warsimulate, war_whatif, war_list, war_compare,
+    check_gear_perk, list_gear_perks, check_job_perk, list_jobs, list_job_perks,
+    set_points_buy, set_points_sell, check_points_price,
+    set_item_threshold, check_item_price, item_price_graph,
+    add_tracked_item_command, remove_tracked_item_command, list_tracked_items_command,
+    deposit, withdraw, check_statement, loan_summary, bank_adjust, bank_history,
+    set_trains_data_command, view_trains_data, add_received_trains,
+    view_insurance_timestamp, view_active_insurance, view_insurance_log,
+    check_shoplifting_alerts,
+    api_stats,
+]
+
+# on_ready fires again after every reconnect; background work starts only once
+BACKGROUND_STARTED = False
+
+
+def log_phase(name, started):
+    print(f"⏱️ {name}: {time.perf_counter() - started:.2f}s")
+
+
+def command_tree_hash(tree, guild) -> str:
+    """Hash of the guild's command definitions as Discord would receive them."""
+    payload = {
+        "guild": guild.id,
+        "commands": sorted((command.to_dict(tree) for command in tree.get_commands(guild=guild)), key=lambda c: c["name"])
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class TFLWarBot(commands.Bot):
+    async def setup_hook(self):
+        # Runs once per process after login, before the gateway connects
+        print(f"⏱️ Imports: {IMPORTS_DONE - STARTUP_STARTED:.2f}s")
+        log_phase("Login", IMPORTS_DONE)
+        try:
+            started = time.perf_counter()
+            start_renderer()
+            log_phase("Chart workers", started)
+
+            started = time.perf_counter()
+            initialise_database()
+            initialise_combined_tracked_file()
+            initialise_bank_ledger()
+            initialise_rollups()
+            log_phase("Database and state", started)
+
+            started = time.perf_counter()
+            guild = discord.Object(id=GUILD_ID)
+            for command in GUILD_COMMANDS:
+                self.tree.add_command(command, guild=guild)
+
+            # Only talk to Discord when the command definitions actually changed
+            tree_hash = command_tree_hash(self.tree, guild)
+            if get_setting("command_tree_hash") != tree_hash:
+                await self.tree.sync()  # no global commands; clears any stale ones
+                synced = await self.tree.sync(guild=guild)
+                set_setting("command_tree_hash", tree_hash)
+                print(f"🔁 Command definitions changed; synced {len(synced)} commands to guild {guild.id}")
+            else:
+                print("✅ Command definitions unchanged; skipped sync")
+            log_phase("Command tree", started)
+
+        except Exception as e:
+            print(f"❌ Error during bot setup: {e}")
+
+    async def close(self):
+        # Send any queued alerts, then release the shared Torn API connection pool and chart workers
+        try:
+            await outbox.flush(self)
+        except Exception as e:
+            print(f"⚠️ Could not flush queued alerts on shutdown: {e}")
+        await close_session()
+        shutdown_renderer()
+        await super().close()
+
 
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = TFLWarBot(command_prefix="!", intents=intents)
 
 
 @bot.event
 async def on_ready():
-    try:
-        guild = discord.Object(id=GUILD_ID)
-
-        # Force remove ALL old commands (global + guild)
-        # Clears any old cached commands that are hanging around
-        await bot.tree.sync()  # first sync globally
-        bot.tree.clear_commands(guild=None)  # clear global commands
-        bot.tree.clear_commands(guild=guild)  # clear guild commands
-        await asyncio.sleep(1)  # optional: allow a brief pause
-        await bot.tree.sync()  # sync cleared
-
-        # Register all commands with the guild
-        bot.tree.add_command(warpredict, guild=guild)
-        bot.tree.add_command(autopredict, guild=guild)
-        bot.tree.add_command(check_gear_perk, guild=guild)
-        bot.tree.add_command(list_gear_perks, guild=guild)
-        bot.tree.add_command(check_job_perk, guild=guild)
-        bot.tree.add_command(list_jobs, guild=guild)
-        bot.tree.add_command(list_job_perks, guild=guild)
-        bot.tree.add_command(set_points_buy, guild=guild)
-        bot.tree.add_command(set_points_sell, guild=guild)
-        bot.tree.add_command(check_points_price, guild=guild)
-        bot.tree.add_command(set_item_threshold, guild=guild)
-        bot.tree.add_command(check_item_price, guild=guild)
-        bot.tree.add_command(item_price_graph, guild=guild)
-        bot.tree.add_command(add_tracked_item_command, guild=guild)
-        bot.tree.add_command(remove_tracked_item_command, guild=guild)
-        bot.tree.add_command(list_tracked_items_command, guild=guild)
-        bot.tree.add_command(deposit, guild=guild)
-        bot.tree.add_command(withdraw, guild=guild)
-        bot.tree.add_command(check_statement, guild=guild)
-        bot.tree.add_command(loan_summary, guild=guild)
-        bot.tree.add_command(bank_adjust, guild=guild)
-        bot.tree.add_command(set_trains_data_command, guild=guild)
-        bot.tree.add_command(view_trains_data, guild=guild)
-        bot.tree.add_command(add_received_trains, guild=guild)
-        bot.tree.add_command(view_insurance_timestamp, guild=guild)
-        bot.tree.add_command(view_active_insurance, guild=guild)
-        bot.tree.add_command(view_insurance_log, guild=guild)
-        bot.tree.add_command(check_shoplifting_alerts, guild=guild)
-
-        # 💥 One-time force clear existing commands to ensure freshness
-        
-        synced = await bot.tree.sync(guild=guild)
-        print(f"🔁 Force-synced {len(synced)} commands to guild {guild.id}")
-
-        # Perform startup tasks
-        initialise_combined_tracked_file()
-        initialise_bank_file()
-        initialise_happy_insurance_file()
-        _initialise_log_file()
+    global BACKGROUND_STARTED
 
+    if BACKGROUND_STARTED:
+        print(f"🔌 Reconnected as {bot.user}")
+        return
+    BACKGROUND_STARTED = True
+
+    try:
+        started = time.perf_counter()
         await post_threshold_summary(bot)
         await post_hourly_point_graph(bot)
 
@@ -91,12 +138,16 @@ async def on_ready():
         start_loops(bot)
         start_train_log_checker(bot)
         monitor_shoplifting.start(bot)
+        war_tracker_loop.start(bot)
+        log_phase("Ready tasks", started)
 
         print(f"✅ Bot is ready. Logged in as {bot.user}")
-       
+        log_phase("Restart to ready", STARTUP_STARTED)
 
     except Exception as e:
         print(f"❌ Error during bot startup: {e}")
 
 
-bot.run(os.getenv("BOT_TOKEN"))
+# Chart workers import this module as __mp_main__; only the real entrypoint runs the bot
+if __name__ == "__main__":
+    bot.run(os.getenv("BOT_TOKEN"))
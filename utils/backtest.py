@@ -0,0 +1,218 @@
+"""
+Offline backtest and benchmark for the war predictors.
+
+Replays war histories from the war archive (or old current_war.json-style
+files) through the predictors, using only what was known at each logged moment,
+and reports end-hour error by war phase. It also times scalar versus batched
+evaluation. No network access is needed:
+
+    python -m utils.backtest [--war-id ID ...] [war_log.json ...] [--synthetic 100000] [--monte-carlo]
+"""
+import sys
+import json
+import time
+import argparse
+
+from utils.predictor import predict_war_end, predict_war_ends, decayed_target
+
+# Phase = share of the war's actual length that had passed when the prediction was made
+PHASES = ((0.0, 0.25, "0–25%"), (0.25, 0.5, "25–50%"), (0.5, 0.75, "50–75%"), (0.75, 1.01, "75–100%"))
+
+
+def load_war(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        war = json.load(f)
+    war["history"] = sorted(war.get("history", []), key=lambda e: e["current_hour"])
+    return war
+
+
+def load_archived_wars(war_ids=None, limit: int = 50) -> list:
+    """Archived wars, one at a time; samples without a goal take the war's starting goal."""
+    from utils import war_archive
+
+    war_ids = war_ids or [summary["war_id"] for summary in war_archive.list_wars(limit)]
+    wars = []
+    for war_id in war_ids:
+        war = war_archive.load_war(war_id)
+        if war is None:
+            print(f"⚠️ War {war_id} is not in the archive")
+            continue
+        goal = war["summary"]["starting_goal"]
+        war["history"] = [dict(e, target=e["target"] or goal) for e in war["history"] if e["target"] or goal]
+        wars.append(war)
+    return wars
+
+
+def actual_end_hour(war: dict) -> tuple:
+    """
+    (end hour, exact?) — the first logged moment the lead had reached the decayed
+    target, else the last logged hour (the log may stop before the war does).
+    """
+    for entry in war["history"]:
+        if abs(entry["lead"]) >= decayed_target(entry["target"], entry["current_hour"]):
+            return entry["current_hour"], True
+    return war["history"][-1]["current_hour"], False
+
+
+def _phase(fraction: float) -> str:
+    for low, high, name in PHASES:
+        if low <= fraction < high:
+            return name
+    return PHASES[-1][2]
+
+
+def _predictions(war: dict, monte_carlo: bool) -> dict:
+    """{predictor name: [(entry, predicted end hour or None)]} for every usable log entry."""
+    entries = [e for e in war["history"] if e["current_hour"] > 0]
+    results = {"solver": [], "logged": []}
+    if monte_carlo:
+        results["monte_carlo"] = []
+
+    for i, entry in enumerate(entries):
+        try:
+            predicted = predict_war_end(entry["current_hour"], entry["lead"], entry["your_score"], entry["target"])["war_end_hour"]
+        except ValueError:
+            predicted = None
+        results["solver"].append((entry, predicted))
+        results["logged"].append((entry, entry.get("predicted_end")))
+
+        if monte_carlo:
+            from utils.war_sim import estimate_scoring_rates, simulate_war
+
+            # Only the history up to this entry: no peeking at later samples
+            opponent = entry["your_score"] - entry["lead"]
+            rates = estimate_scoring_rates(entries[:i + 1], entry["current_hour"], entry["your_score"], opponent)
+            sim = simulate_war(entry["current_hour"], entry["your_score"], opponent, entry["target"], rates, paths=2000, seed=i)
+            results["monte_carlo"].append((entry, sim["end_hour_percentiles"].get(50)))
+
+    return results
+
+
+def backtest(wars: list, monte_carlo: bool = False) -> dict:
+    """
+    {predictor: {phase: [signed errors in hours]}} plus the count of unsolved
+    predictions. Wars whose log never reaches the end are left out.
+    """
+    errors, unsolved = {}, {}
+    for war in wars:
+        if len(war["history"]) < 2:
+            continue
+        end_hour, exact = actual_end_hour(war)
+        if not exact:
+            continue
+        start_hour = war["history"][0]["current_hour"]
+        span = max(end_hour - start_hour, 1e-9)
+
+        for name, predictions in _predictions(war, monte_carlo).items():
+            by_phase = errors.setdefault(name, {})
+            for entry, predicted in predictions:
+                if entry["current_hour"] > end_hour:
+                    continue
+                if predicted is None:
+                    unsolved[name] = unsolved.get(name, 0) + 1
+                    continue
+                phase = _phase((entry["current_hour"] - start_hour) / span)
+                by_phase.setdefault(phase, []).append(predicted - end_hour)
+    return {"errors": errors, "unsolved": unsolved}
+
+
+def benchmark(scenarios: list, repeat: int = 3) -> dict:
+    """Per-call latency and throughput of predict_war_end in a loop vs one predict_war_ends call."""
+    import numpy as np
+
+    hours, leads, scores, goals = (np.array(column, dtype=float) for column in zip(*scenarios))
+
+    scalar_best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for args in scenarios:
+            try:
+                predict_war_end(*args)
+            except ValueError:
+                pass
+        scalar_best = min(scalar_best, time.perf_counter() - started)
+
+    batch_best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        predict_war_ends(hours, leads, scores, goals)
+        batch_best = min(batch_best, time.perf_counter() - started)
+
+    n = len(scenarios)
+    return {
+        "scenarios": n,
+        "scalar_us_per_call": scalar_best / n * 1e6,
+        "scalar_per_second": n / scalar_best,
+        "batched_us_per_call": batch_best / n * 1e6,
+        "batched_per_second": n / batch_best,
+    }
+
+
+def synthetic_scenarios(count: int, seed: int = 0) -> list:
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    hours = rng.uniform(1, 120, count)
+    leads = rng.normal(0, 2500, count).round()
+    scores = np.abs(leads) + rng.uniform(0, 20000, count).round()
+    goals = rng.choice([3000, 5000, 7600, 10000], count)
+    return list(zip(hours.tolist(), leads.tolist(), scores.tolist(), goals.tolist()))
+
+
+def _print_report(report: dict):
+    print("End-hour error by phase (predicted - actual, hours):")
+    for name, by_phase in report["errors"].items():
+        print(f"  {name}:")
+        for _, _, phase in PHASES:
+            errors = by_phase.get(phase, [])
+            if not errors:
+                continue
+            mae = sum(abs(e) for e in errors) / len(errors)
+            bias = sum(errors) / len(errors)
+            print(f"    {phase:>8}: MAE {mae:6.2f}h | bias {bias:+6.2f}h | n={len(errors)}")
+        if report["unsolved"].get(name):
+            print(f"    unsolved: {report['unsolved'][name]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest and benchmark the war predictors offline.")
+    parser.add_argument("logs", nargs="*", help="War log JSON files (default: the war archive)")
+    parser.add_argument("--war-id", type=int, action="append", help="Archived war to replay (repeatable)")
+    parser.add_argument("--synthetic", type=int, default=0, help="Also benchmark on N random scenarios")
+    parser.add_argument("--repeat", type=int, default=3, help="Benchmark repetitions (best is reported)")
+    parser.add_argument("--monte-carlo", action="store_true", help="Include the Monte Carlo median (slow)")
+    args = parser.parse_args(argv)
+
+    wars = load_archived_wars(args.war_id) if args.war_id or not args.logs else []
+    for path in args.logs:
+        try:
+            wars.append(load_war(path))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Skipping {path}: {e}")
+
+    if wars:
+        print(f"📚 Backtesting {len(wars)} war(s), {sum(len(w['history']) for w in wars)} logged prediction(s)")
+        for war in wars:
+            end_hour, exact = actual_end_hour(war) if war["history"] else (None, False)
+            print(f"  war {war.get('war_id')}: " + (f"ends at hour {end_hour}" if exact else "no logged end, skipped"))
+        _print_report(backtest(wars, args.monte_carlo))
+
+    scenarios = [
+        (e["current_hour"], e["lead"], e["your_score"], e["target"])
+        for war in wars for e in war["history"] if e["current_hour"] > 0
+    ]
+    if args.synthetic:
+        scenarios += synthetic_scenarios(args.synthetic)
+    if not scenarios:
+        print("Nothing to benchmark; pass war logs or --synthetic N.")
+        return 1
+
+    timing = benchmark(scenarios, args.repeat)
+    print(f"⏱️ {timing['scenarios']:,} scenarios")
+    print(f"  scalar : {timing['scalar_us_per_call']:8.2f} µs/call | {timing['scalar_per_second']:12,.0f} calls/s")
+    print(f"  batched: {timing['batched_us_per_call']:8.2f} µs/call | {timing['batched_per_second']:12,.0f} calls/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,38 +1,119 @@
-import os
 import json
+import time
+from typing import Optional
 
-BANK_FILE = "/mnt/data/bank_of_seb.json"
+from utils.storage import get_connection, transaction
 
-def initialise_bank_file():
-    """Create the bank file if it doesn't exist."""
-    if not os.path.exists(BANK_FILE):
-        print("🆕 Creating empty bank file...")
-        with open(BANK_FILE, "w", encoding="utf-8") as f:
-            json.dump({}, f, indent=2)
-        print("✅ Bank file created.")
-    else:
-        print("✅ Bank file already exists.")
+BANK_FILE = "/mnt/data/bank_of_seb.json"  # legacy, imported once by utils.json_migration
 
-def load_bank_data():
-    if not os.path.exists(BANK_FILE):
-        return {}
-    with open(BANK_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+# Every balance change is appended to bank_ledger; bank_balances is the cached
+# running balance per user and bank_snapshots checkpoints all balances so they
+# can be rebuilt without replaying the whole ledger.
+LEDGER_KINDS = ("opening", "deposit", "withdraw", "adjust")
+SNAPSHOT_EVERY = 100
+STATEMENT_PAGE_SIZE = 10
 
-def save_bank_data(data):
-    with open(BANK_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+_balance_cache = {}
+
+def initialise_bank_ledger():
+    """Give balances that predate the ledger an opening entry, once."""
+    conn = get_connection()
+    if conn.execute("SELECT 1 FROM bank_ledger LIMIT 1").fetchone():
+        return
+
+    rows = conn.execute("SELECT user_id, balance FROM bank_balances").fetchall()
+    if not rows:
+        return
+
+    now = int(time.time())
+    with transaction() as conn:
+        conn.executemany(
+            "INSERT INTO bank_ledger (user_id, kind, amount, balance_after, actor_id, created_at) "
+            "VALUES (?, 'opening', ?, ?, NULL, ?)",
+            [(row["user_id"], row["balance"], row["balance"], now) for row in rows]
+        )
+    take_snapshot()
+    print(f"✅ Opened Bank of Seb ledger with {len(rows)} existing balance(s).")
 
 def get_balance(user_id: int) -> int:
-    data = load_bank_data()
-    return data.get(str(user_id), 0)
+    uid = int(user_id)
+    if uid not in _balance_cache:
+        row = get_connection().execute(
+            "SELECT balance FROM bank_balances WHERE user_id = ?", (uid,)
+        ).fetchone()
+        _balance_cache[uid] = row["balance"] if row else 0
+    return _balance_cache[uid]
+
+def update_balance(user_id: int, amount: int, kind: str = "adjust", actor_id: Optional[int] = None) -> int:
+    """Append a ledger entry and update the cached balance in one transaction. Returns the new balance."""
+    if kind not in LEDGER_KINDS:
+        raise ValueError(f"Unknown ledger entry kind: {kind}")
+
+    uid = int(user_id)
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO bank_balances (user_id, balance) VALUES (?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET balance = balance + excluded.balance",
+            (uid, amount)
+        )
+        new_balance = conn.execute("SELECT balance FROM bank_balances WHERE user_id = ?", (uid,)).fetchone()[0]
+        cursor = conn.execute(
+            "INSERT INTO bank_ledger (user_id, kind, amount, balance_after, actor_id, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (uid, kind, amount, new_balance, actor_id, int(time.time()))
+        )
+        ledger_id = cursor.lastrowid
 
-def update_balance(user_id: int, amount: int):
-    data = load_bank_data()
-    uid = str(user_id)
-    data[uid] = data.get(uid, 0) + amount
-    save_bank_data(data)
+    _balance_cache[uid] = new_balance
+    if ledger_id % SNAPSHOT_EVERY == 0:
+        take_snapshot()
+    return new_balance
 
 def get_all_balances() -> dict:
     """Return the full dict of user_id -> balance."""
-    return load_bank_data()
+    rows = get_connection().execute("SELECT user_id, balance FROM bank_balances").fetchall()
+    return {str(row["user_id"]): row["balance"] for row in rows}
+
+def get_statement(user_id: int, page: int = 1, page_size: int = STATEMENT_PAGE_SIZE):
+    """
+    One page of a user's ledger entries, newest first, read through the
+    (user_id, id) index. Returns (entries, total_entries).
+    """
+    uid = int(user_id)
+    conn = get_connection()
+    total = conn.execute("SELECT COUNT(*) FROM bank_ledger WHERE user_id = ?", (uid,)).fetchone()[0]
+    rows = conn.execute(
+        "SELECT id, kind, amount, balance_after, actor_id, created_at FROM bank_ledger "
+        "WHERE user_id = ? ORDER BY id DESC LIMIT ? OFFSET ?",
+        (uid, page_size, (max(page, 1) - 1) * page_size)
+    ).fetchall()
+    return [dict(row) for row in rows], total
+
+def take_snapshot():
+    """Checkpoint every balance at the current end of the ledger."""
+    conn = get_connection()
+    last = conn.execute("SELECT COALESCE(MAX(id), 0) FROM bank_ledger").fetchone()[0]
+    balances = get_all_balances()
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO bank_snapshots (ledger_id, created_at, balances) VALUES (?, ?, ?)",
+            (last, int(time.time()), json.dumps(balances))
+        )
+
+def rebuild_balances() -> dict:
+    """Recompute balances from the latest snapshot plus the ledger entries after it, and store them."""
+    conn = get_connection()
+    snapshot = conn.execute(
+        "SELECT ledger_id, balances FROM bank_snapshots ORDER BY id DESC LIMIT 1"
+    ).fetchone()
+    balances = {int(uid): bal for uid, bal in json.loads(snapshot["balances"]).items()} if snapshot else {}
+    after = snapshot["ledger_id"] if snapshot else 0
+
+    for row in conn.execute("SELECT user_id, amount FROM bank_ledger WHERE id > ? ORDER BY id", (after,)):
+        balances[row["user_id"]] = balances.get(row["user_id"], 0) + row["amount"]
+
+    with transaction() as conn:
+        conn.execute("DELETE FROM bank_balances")
+        conn.executemany("INSERT INTO bank_balances (user_id, balance) VALUES (?, ?)", list(balances.items()))
+    _balance_cache.clear()
+    return balances
@@ -0,0 +1,159 @@
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+
+
+def make_cache_key(path: str, params: Optional[dict] = None) -> tuple:
+    """Stable key for an endpoint + its query params (the API key is never part of it)."""
+    return path, tuple(sorted((params or {}).items()))
+
+
+class SingleFlightCache:
+    """
+    Base for async caches with single-flight coalescing: while a load for a key
+    is in flight, every other caller for that key awaits the same call instead
+    of starting its own. Subclasses look values up and `_store` them.
+    """
+
+    def __init__(self):
+        self._inflight = {}  # key -> asyncio.Future
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _store(self, key, value):
+        raise NotImplementedError
+
+    async def _get_or_load(self, key, cached, load):
+        """`cached` is the subclass's lookup result (None on a miss); `load()` makes the value."""
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        self.misses += 1
+        future = asyncio.ensure_future(load())
+        self._inflight[key] = future
+
+        def _finished(done):
+            self._inflight.pop(key, None)
+            if not done.cancelled() and done.exception() is None:
+                self._store(key, done.result())
+
+        future.add_done_callback(_finished)
+        # Shielded so one impatient caller can't cancel the load for everyone else
+        return await asyncio.shield(future)
+
+    def _lookup_stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0
+        }
+
+
+class TTLCache(SingleFlightCache):
+    """
+    Time-bounded response cache with single-flight coalescing. Each caller
+    decides how stale a value it accepts.
+    """
+
+    def __init__(self, default_ttl: float = 30, max_entries: int = 512):
+        super().__init__()
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+
+    def _store(self, key, value):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def peek(self, key, max_age: Optional[float] = None):
+        """Cached value if it is no older than `max_age` seconds, else None."""
+        max_age = self.default_ttl if max_age is None else max_age
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] <= max_age:
+            return entry[1]
+        return None
+
+    async def get_or_fetch(self, key, fetch, max_age: Optional[float] = None):
+        """Return a fresh cached value, join an in-flight fetch, or call `fetch()` once."""
+        return await self._get_or_load(key, self.peek(key, max_age), fetch)
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), **self._lookup_stats()}
+
+
+api_cache = TTLCache()
+
+
+def make_chart_key(fn, args: tuple, kwargs: dict) -> str:
+    """
+    Content address for a chart: the render function plus a hash of every input.
+    New samples change the inputs and so the key, which is what keeps cached
+    images from ever going stale.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{fn.__module__}.{fn.__qualname__}".encode())
+    for value in list(args) + sorted(kwargs.items()):
+        if hasattr(value, "tobytes") and hasattr(value, "dtype"):
+            # NumPy arrays: hash the raw buffer, not a truncated repr
+            digest.update(f"|{value.dtype}{value.shape}|".encode())
+            digest.update(value.tobytes())
+        else:
+            digest.update(f"|{value!r}|".encode())
+    return digest.hexdigest()
+
+
+class ChartCache(SingleFlightCache):
+    """
+    LRU cache of rendered PNGs bounded by total size in bytes. Keys come from
+    make_chart_key, so entries never need explicit invalidation; identical
+    concurrent renders are coalesced into one.
+    """
+
+    def __init__(self, max_bytes: int):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> png bytes
+
+    def _store(self, key, png: bytes):
+        if len(png) > self.max_bytes:
+            return
+        if key in self._entries:
+            self.total_bytes -= len(self._entries.pop(key))
+        self._entries[key] = png
+        self.total_bytes += len(png)
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.total_bytes -= len(evicted)
+
+    async def get_or_render(self, key, render) -> bytes:
+        png = self._entries.get(key)
+        if png is not None:
+            self._entries.move_to_end(key)
+        return await self._get_or_load(key, png, render)
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self.total_bytes, **self._lookup_stats()}
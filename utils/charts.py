@@ -1,23 +1,18 @@
-import json
-import os
-from datetime import datetime
-import matplotlib.pyplot as plt
 from io import BytesIO
 from discord.ext import tasks
 import discord
-import requests
 
-from constants import ITEM_HISTORY_FILE, POINT_HISTORY_FILE
-from utils.history import load_item_price_history
+from utils.history import get_price_history
 from utils.normalise import normalise_item_name
 from utils.tracked_items import load_combined_items_data
+from utils.torn_api import fetch_lowest_points_offer
+from utils.rendering import render, price_trend_png
 
 
 async def generate_item_price_graph(interaction: discord.Interaction, item: str):
     await interaction.response.defer()
 
     combined_items = load_combined_items_data()
-    history_data = load_item_price_history()
 
     normalised = normalise_item_name(item)
     if not normalised or normalised not in combined_items:
@@ -25,32 +20,18 @@ async def generate_item_price_graph(interaction: discord.Interaction, item: str)
         await interaction.followup.send(f"❌ Unsupported item. Try one of: {supported}")
         return
 
-    price_history = history_data.get(normalised, [])
+    series = get_price_history(normalised, 7)
     pretty_name = item.title()
 
-    if not price_history:
+    if series["close"].size == 0:
         await interaction.followup.send(f"❌ No data found for **{pretty_name}**.")
         return
 
-    times = [datetime.utcfromtimestamp(entry["timestamp"]).strftime("%d %b %H:%M") for entry in price_history]
-    prices = [entry["price"] for entry in price_history]
-
-    fig, ax = plt.subplots()
-    ax.plot(times, prices, marker="o", linestyle="-", label=pretty_name)
-    ax.set_title(f"{pretty_name} Price Trend (Last 7 Days)")
-    ax.set_xlabel("Time (UTC)")
-    ax.set_ylabel("Price (T$)")
-    plt.xticks(rotation=45)
-    ax.grid(True)
-    plt.tight_layout()
-
-    buf = BytesIO()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    file = discord.File(buf, filename="item_trend.png")
-    plt.close()
-
-    await interaction.followup.send(file=file)
+    png = await render(
+        price_trend_png, f"{pretty_name} Price Trend (Last 7 Days)",
+        series["timestamp"], series["close"], label=pretty_name
+    )
+    await interaction.followup.send(file=discord.File(BytesIO(png), filename="item_trend.png"))
 
 
 @tasks.loop(hours=12)
@@ -58,29 +39,16 @@ async def post_hourly_point_graph(bot):
     await bot.wait_until_ready()
 
     try:
-        with open(POINT_HISTORY_FILE, "r", encoding="utf-8") as f:
-            history = json.load(f)
+        series = get_price_history(None, 1)
 
-        if len(history) < 2:
+        if series["close"].size < 2:
             return  # Not enough data
 
-        times = [datetime.utcfromtimestamp(e["timestamp"]).strftime("%H:%M") for e in history]
-        prices = [e["price"] for e in history]
-
-        fig, ax = plt.subplots()
-        ax.plot(times, prices, label="Point Price")
-        ax.set_title("Point Price - Last 24 Hours")
-        ax.set_xlabel("Time (UTC)")
-        ax.set_ylabel("Price (T$)")
-        ax.grid(True)
-        plt.xticks(rotation=45)
-
-        buf = BytesIO()
-        plt.tight_layout()
-        plt.savefig(buf, format="png")
-        buf.seek(0)
-        file = discord.File(buf, filename="points_graph.png")
-        plt.close()
+        png = await render(
+            price_trend_png, "Point Price - Last 24 Hours",
+            series["timestamp"], series["close"], label="Point Price", date_format="%H:%M"
+        )
+        file = discord.File(BytesIO(png), filename="points_graph.png")
 
         channel = discord.utils.get(bot.get_all_channels(), name="trading-alerts")
         if channel:
@@ -90,17 +58,6 @@ async def post_hourly_point_graph(bot):
         print(f"[Hourly graph error] {e}")
 
 
-def get_points_price():
-    api_key = os.getenv("TORN_API_KEY")
-    if not api_key:
-        raise ValueError("Missing TORN_API_KEY")
-
-    url = f"https://api.torn.com/market/?selections=pointsmarket&key={api_key}"
-    response = requests.get(url)
-    data = response.json()
-
-    if "pointsmarket" not in data or not data["pointsmarket"]:
-        raise ValueError("No pointsmarket data found")
-
-    lowest_offer = min(data["pointsmarket"].values(), key=lambda x: x["cost"])
-    return lowest_offer["cost"]
+async def get_points_price(max_age: float = 30):
+    lowest_offer = await fetch_lowest_points_offer(max_age=max_age)
+    return lowest_offer.cost
@@ -1,164 +1,109 @@
-import os
-import json
 import time
-import requests
 from datetime import datetime
 from discord.ext import tasks
-import discord
-from utils.tracked_items import load_combined_items_data
-from constants import ITEM_HISTORY_FILE
+from constants import get_api_key
 from utils.thresholds import load_thresholds
-from utils.history import log_point_price, trim_item_price_history
+from utils.history import (
+    log_point_price, log_item_prices, roll_up_item_prices, trim_item_price_history, ITEM_HISTORY_INTERVAL
+)
+from utils.torn_api import fetch_lowest_points_offer
+from utils.market_feed import market_feed, market_poll_loop
+from utils.outbox import outbox, outbox_flush_loop
+
+TRADING_CHANNEL = "trading-alerts"
+TRADING_TITLE = "💹 Trading Alerts"
 
 POINTS_SILENT_CHECKS = 0
 ITEM_SILENT_CHECKS = 0
+LAST_ITEM_HISTORY_WRITE = 0
 
 @tasks.loop(minutes=1)
 async def check_point_market_loop(bot):
     global POINTS_SILENT_CHECKS
     await bot.wait_until_ready()
     thresholds = load_thresholds()
-    api_key = os.getenv("TORN_API_KEY")
-    if not api_key:
+    if not get_api_key("points"):
         return
 
     try:
-        url = f"https://api.torn.com/market/?selections=pointsmarket&key={api_key}"
-        response = requests.get(url)
-        data = response.json()
-
-        if "pointsmarket" not in data or not data["pointsmarket"]:
-            print("[Error] No pointsmarket data found.")
-            return
-
-        lowest_offer = min(data["pointsmarket"].values(), key=lambda x: x["cost"])
-        price = lowest_offer["cost"]
+        lowest_offer = await fetch_lowest_points_offer()
+        price = lowest_offer.cost
         log_point_price(price)
 
-        channel = discord.utils.get(bot.get_all_channels(), name="trading-alerts")
-        if channel:
-            if thresholds["buy"] and price <= thresholds["buy"]:
-                await channel.send(f"💰 **Points are cheap!** {price:n} T$ (≤ {thresholds['buy']})")
-                POINTS_SILENT_CHECKS = 0
-            elif thresholds["sell"] and price >= thresholds["sell"]:
-                await channel.send(f"🔥 **Points are expensive!** {price:n} T$ (≥ {thresholds['sell']})")
+        if thresholds["buy"] and price <= thresholds["buy"]:
+            outbox.post(TRADING_CHANNEL, f"💰 **Points are cheap!** {price:n} T$ (≤ {thresholds['buy']})",
+                        title=TRADING_TITLE, dedupe_key="points:buy")
+            POINTS_SILENT_CHECKS = 0
+        elif thresholds["sell"] and price >= thresholds["sell"]:
+            outbox.post(TRADING_CHANNEL, f"🔥 **Points are expensive!** {price:n} T$ (≥ {thresholds['sell']})",
+                        title=TRADING_TITLE, dedupe_key="points:sell")
+            POINTS_SILENT_CHECKS = 0
+        else:
+            POINTS_SILENT_CHECKS += 1
+            if POINTS_SILENT_CHECKS >= 60:
+                outbox.post(TRADING_CHANNEL, f"🔍 **Points market check**: {price:n} T$ (no alerts triggered)",
+                            title=TRADING_TITLE)
                 POINTS_SILENT_CHECKS = 0
-            else:
-                POINTS_SILENT_CHECKS += 1
-                if POINTS_SILENT_CHECKS >= 60:
-                    await channel.send(f"🔍 **Points market check**: {price:n} T$ (no alerts triggered)")
-                    POINTS_SILENT_CHECKS = 0
 
     except Exception as e:
         print(f"[Error checking point market] {e}")
 
 
-@tasks.loop(seconds=20)
-async def check_item_prices_loop(bot):
-    await bot.wait_until_ready()
+async def check_item_price_alert(bot, snapshot, info):
+    """Market feed subscriber: alert when an item crosses its buy/sell threshold."""
     global ITEM_SILENT_CHECKS
 
-    api_key = os.getenv("TORN_API_KEY")
-    if not api_key:
-        return
-
-    combined_data = load_combined_items_data()
-    channel = discord.utils.get(bot.get_all_channels(), name="trading-alerts")
-    if not channel:
-        print("⚠️ Channel 'trading-alerts' not found.")
+    if snapshot.price is None:
         return
 
-    alert_triggered = False
+    name = snapshot.item_key
+    buy_threshold = info.get("buy")
+    sell_threshold = info.get("sell")
+    lowest_price = snapshot.price
 
-    for name, info in combined_data.items():
-        item_id = info.get("item_id")
-        buy_threshold = info.get("buy")
-        sell_threshold = info.get("sell")
+    alert_msg = None
+    if buy_threshold and lowest_price <= buy_threshold:
+        alert_msg, side = f"💰 **{name.title()} is cheap!** {lowest_price:n} T$ (≤ {buy_threshold})", "buy"
+    elif sell_threshold and lowest_price >= sell_threshold:
+        alert_msg, side = f"🔥 **{name.title()} is expensive!** {lowest_price:n} T$ (≥ {sell_threshold})", "sell"
 
-        try:
-            url = f"https://api.torn.com/v2/market/{item_id}/itemmarket?key={api_key}"
-            response = requests.get(url)
-            data = response.json()
+    if alert_msg:
+        # Coalesced with the rest of this sweep's alerts; repeats within the cooldown are dropped
+        outbox.post(TRADING_CHANNEL, alert_msg, title=TRADING_TITLE, dedupe_key=f"item:{name}:{side}")
+        ITEM_SILENT_CHECKS = 0
 
-            listings = data.get("itemmarket", {}).get("listings", [])
-            if not listings:
-                continue
 
-            lowest_price = min(listing["price"] for listing in listings)
-
-            alert_msg = None
-            if buy_threshold and lowest_price <= buy_threshold:
-                alert_msg = f"💰 **{name.title()} is cheap!** {lowest_price:n} T$ (≤ {buy_threshold})"
-            elif sell_threshold and lowest_price >= sell_threshold:
-                alert_msg = f"🔥 **{name.title()} is expensive!** {lowest_price:n} T$ (≥ {sell_threshold})"
-
-            if alert_msg:
-                await channel.send(alert_msg)
-                alert_triggered = True
-                ITEM_SILENT_CHECKS = 0
-
-        except Exception as e:
-            print(f"[Error checking price for {name.title()}] {e}")
+async def item_sweep_heartbeat(bot, snapshots):
+    """Market feed sweep subscriber: hourly 'still running' note when nothing alerted."""
+    global ITEM_SILENT_CHECKS
 
     ITEM_SILENT_CHECKS += 1
-    if ITEM_SILENT_CHECKS >= 180:
-        try:
-            sample_item = next(iter(combined_data))
-            await channel.send(f"🔍 Item price check running — no alerts in the past hour (e.g., {sample_item.title()}).")
-            ITEM_SILENT_CHECKS = 0
-        except StopIteration:
-            pass
-
-
-@tasks.loop(minutes=30)
-async def log_item_price_history(bot):
-    await bot.wait_until_ready()
-
-    api_key = os.getenv("TORN_API_KEY")
-    if not api_key:
-        return
+    if ITEM_SILENT_CHECKS >= 180 and snapshots:
+        sample_item = next(iter(snapshots))
+        outbox.post(TRADING_CHANNEL, f"🔍 Item price check running — no alerts in the past hour (e.g., {sample_item.title()}).",
+                    title=TRADING_TITLE)
+        ITEM_SILENT_CHECKS = 0
 
-    combined_data = load_combined_items_data()
 
-    try:
-        with open(ITEM_HISTORY_FILE, "r", encoding="utf-8") as f:
-            history = json.load(f)
-    except FileNotFoundError:
-        history = {}
+async def log_item_price_history(snapshots):
+    """
+    Market feed sweep subscriber: every sweep feeds the OHLC rollups, and the
+    raw history gets the latest prices every 30 minutes.
+    """
+    global LAST_ITEM_HISTORY_WRITE
 
     now = int(time.time())
-    one_week_ago = now - 7 * 86400
-
-    for name, info in combined_data.items():
-        item_id = info.get("item_id")
-        try:
-            url = f"https://api.torn.com/v2/market/{item_id}/itemmarket?key={api_key}"
-            response = requests.get(url)
-            data = response.json()
-
-            listings = data.get("itemmarket", {}).get("listings", [])
-            if not listings:
-                continue
-
-            lowest_price = min(listing["price"] for listing in listings)
-
-            normalised = name.lower()
-            if normalised not in history:
-                history[normalised] = []
-
-            history[normalised].append({"timestamp": now, "price": lowest_price})
-
-            # Trim to 7 days
-            history[normalised] = [
-                entry for entry in history[normalised] if entry["timestamp"] >= one_week_ago
-            ]
+    priced = {key.lower(): snap.price for key, snap in snapshots.items() if snap.price is not None}
+    if not priced:
+        return
 
-        except Exception as e:
-            print(f"[Error logging history for {name.title()}] {e}")
+    roll_up_item_prices(priced, now)
+    if now - LAST_ITEM_HISTORY_WRITE < ITEM_HISTORY_INTERVAL:
+        return
 
-    with open(ITEM_HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(history, f, indent=2)
+    log_item_prices(priced, now)
 
+    LAST_ITEM_HISTORY_WRITE = now
     print("[Log] Item price history updated.")
 
 
@@ -169,7 +114,12 @@ async def daily_trim_item_history_loop(bot):
 
 
 def start_loops(bot):
+    # Item prices come from the shared market feed; alerts and history just subscribe to it
+    market_feed.subscribe(lambda snapshot, info: check_item_price_alert(bot, snapshot, info))
+    market_feed.subscribe_sweep(lambda snapshots: item_sweep_heartbeat(bot, snapshots))
+    market_feed.subscribe_sweep(log_item_price_history)
+
     check_point_market_loop.start(bot)
-    check_item_prices_loop.start(bot)
-    log_item_price_history.start(bot)
+    market_poll_loop.start(bot)
     daily_trim_item_history_loop.start(bot)
+    outbox_flush_loop.start(bot)
@@ -1,117 +1,138 @@
-import os
-import json
-import requests
-from datetime import datetime, timedelta, timezone
-import discord
+import time
+import bisect
+from datetime import datetime, timezone
 
-TORN_API_KEY = os.getenv("TORN_API_KEY")
-TORN_LOG_URL = f"https://api.torn.com/user/?selections=log&key={TORN_API_KEY}"
+from utils.storage import get_connection, transaction, get_setting, set_setting
+from utils.outbox import outbox
 
+# Legacy files, imported once by utils.json_migration
 HAPPY_INSURANCE_FILE = "/mnt/data/happy_insurance.json"  # last checked timestamp
 HAPPY_INSURANCE_LOG_FILE = "/mnt/data/happy_insurance_log.json"  # all logs
 
-def _initialise_log_file():
-    if not os.path.exists(HAPPY_INSURANCE_LOG_FILE):
-        with open(HAPPY_INSURANCE_LOG_FILE, "w", encoding="utf-8") as f:
-            json.dump([], f)
-        print("✅ Created happy insurance log JSON file.")
+COVER_SECONDS = 3 * 3600
 
-def fetch_logs():
-    response = requests.get(TORN_LOG_URL)
-    data = response.json()
-    return data.get("log", {})
-
-def check_xanax_insurance(last_timestamp):
-    logs = fetch_logs()
+def check_xanax_insurance(entries):
+    """Pick Xanax payments out of "Item receive" log entries (already deduped by the log ingester)."""
     new_payments = []
 
-    for log_id, log_entry in logs.items():
+    for log_entry in entries:
         if log_entry.get("title") == "Item receive" and "data" in log_entry:
             data = log_entry["data"]
             items = data.get("items", [])
             timestamp = log_entry.get("timestamp", 0)
 
-            if timestamp <= last_timestamp:
-                continue
-
             for item in items:
                 if item.get("id") == 206:  # Xanax
-                    sender_id = data.get("sender")
-                    dt = datetime.fromtimestamp(timestamp, tz=timezone.utc)
-                    coverage_end = dt + timedelta(hours=3)
-                    message = data.get("message", "")
-
                     payment = {
-                        "sender_id": sender_id,
+                        "sender_id": data.get("sender"),
                         "timestamp": timestamp,
-                        "coverage_end": coverage_end.isoformat(),
-                        "message": message
+                        "coverage_end": timestamp + COVER_SECONDS,
+                        "message": data.get("message", "")
                     }
                     new_payments.append(payment)
     return new_payments
 
 def load_last_timestamp():
-    if not os.path.exists(HAPPY_INSURANCE_FILE):
-        return 0
-    with open(HAPPY_INSURANCE_FILE, "r", encoding="utf-8") as f:
-        return int(f.read().strip() or "0")
+    return int(get_setting("happy_insurance_last_timestamp", 0))
 
 def save_last_timestamp(timestamp):
-    with open(HAPPY_INSURANCE_FILE, "w", encoding="utf-8") as f:
-        f.write(str(timestamp))
+    set_setting("happy_insurance_last_timestamp", int(timestamp))
+
+class ActiveCovers:
+    """
+    Covers that haven't ended yet, kept in memory sorted by coverage end.
+    Loaded once from the coverage_end index; payments are inserted as they are
+    saved and expired covers are cut off the front on each read, so listing
+    active cover is a bisect plus the k live entries.
+    """
+
+    def __init__(self):
+        self._ends = None
+        self._logs = []
+
+    def _load(self, now: int):
+        rows = get_connection().execute(
+            "SELECT sender_id, timestamp, coverage_end, message FROM insurance_log "
+            "WHERE coverage_end > ? ORDER BY coverage_end",
+            (now,)
+        ).fetchall()
+        self._logs = _rows_to_logs(rows)
+        self._ends = [log["coverage_end"] for log in self._logs]
+
+    def add(self, log: dict):
+        if self._ends is None:
+            return  # Picked up from the database on first read
+        i = bisect.bisect_right(self._ends, log["coverage_end"])
+        self._ends.insert(i, log["coverage_end"])
+        self._logs.insert(i, log)
+
+    def active(self, now: int = None) -> list:
+        """Active covers ordered by payment time."""
+        now = now or int(time.time())
+        if self._ends is None:
+            self._load(now)
+        expired = bisect.bisect_right(self._ends, now)
+        if expired:
+            del self._ends[:expired]
+            del self._logs[:expired]
+        return sorted(self._logs, key=lambda log: log["timestamp"])
+
+
+active_covers = ActiveCovers()
 
 def save_insurance_logs(new_logs):
-    _initialise_log_file()
-    with open(HAPPY_INSURANCE_LOG_FILE, "r+", encoding="utf-8") as f:
-        existing = json.load(f)
-        updated = existing + new_logs
-        f.seek(0)
-        json.dump(updated, f, indent=2)
-        f.truncate()
+    with transaction() as conn:
+        conn.executemany(
+            "INSERT INTO insurance_log (sender_id, timestamp, coverage_end, message) VALUES (?, ?, ?, ?)",
+            [(log["sender_id"], log["timestamp"], log["coverage_end"], log.get("message")) for log in new_logs]
+        )
+    for log in new_logs:
+        active_covers.add(log)
+
+def _rows_to_logs(rows):
+    return [
+        {
+            "sender_id": row["sender_id"],
+            "timestamp": row["timestamp"],
+            "coverage_end": row["coverage_end"],
+            "message": row["message"]
+        }
+        for row in rows
+    ]
 
 def load_insurance_logs():
-    _initialise_log_file()
-    with open(HAPPY_INSURANCE_LOG_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    rows = get_connection().execute(
+        "SELECT sender_id, timestamp, coverage_end, message FROM insurance_log ORDER BY timestamp"
+    ).fetchall()
+    return _rows_to_logs(rows)
 
 def get_active_insurance_logs():
-    logs = load_insurance_logs()
-    now = datetime.now(tz=timezone.utc)
-    active = [
-        log for log in logs
-        if datetime.fromtimestamp(log["timestamp"], tz=timezone.utc) <= now < datetime.fromisoformat(log["coverage_end"])
-    ]
-    return active
+    return active_covers.active()
 
 def get_recent_insurance_logs(hours=24):
-    logs = load_insurance_logs()
-    cutoff = datetime.now(tz=timezone.utc) - timedelta(hours=hours)
-    recent = [
-        log for log in logs
-        if datetime.fromtimestamp(log["timestamp"], tz=timezone.utc) >= cutoff
-    ]
-    return recent
-
-async def post_insurance_to_channel(bot, payment):
-    channel = discord.utils.get(bot.get_all_channels(), name="happy-insurance-tracker")
-    if not channel:
-        print("❌ Channel 'happy-insurance-tracker' not found.")
-        return
-
-    dt = datetime.fromtimestamp(payment["timestamp"], tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-    end_dt = datetime.fromisoformat(payment["coverage_end"]).strftime("%Y-%m-%d %H:%M:%S UTC")
+    # Range scan on the timestamp index: O(log n + k)
+    rows = get_connection().execute(
+        "SELECT sender_id, timestamp, coverage_end, message FROM insurance_log "
+        "WHERE timestamp >= ? ORDER BY timestamp",
+        (int(time.time() - hours * 3600),)
+    ).fetchall()
+    return _rows_to_logs(rows)
+
+def format_utc(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+
+def post_insurance_to_channel(payment):
+    """Queue the payment notice; payments seen in the same tick share one embed."""
+    dt = format_utc(payment["timestamp"])
+    end_dt = format_utc(payment["coverage_end"])
 
     msg = (
-        f"🛡️ **New Happy Insurance Payment!**\n"
         f"👤 **Sender ID**: {payment['sender_id']}\n"
         f"⏰ **Time**: {dt}\n"
         f"🕒 **Coverage ends at**: {end_dt}\n"
         f"📝 **Message**: {payment['message'] or '(no message)'}"
     )
-    await channel.send(msg)
-
-def initialise_happy_insurance_file():
-    if not os.path.exists(HAPPY_INSURANCE_FILE):
-        with open(HAPPY_INSURANCE_FILE, "w", encoding="utf-8") as f:
-            f.write("0")
-        print("✅ Created happy insurance timestamp file.")
+    outbox.post(
+        "happy-insurance-tracker", msg, title="🛡️ New Happy Insurance Payment!",
+        dedupe_key=f"insurance:{payment['sender_id']}:{payment['timestamp']}"
+    )
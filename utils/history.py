@@ -1,81 +1,43 @@
-import json
 import time
-import os
-from datetime import datetime, timedelta
-from constants import ITEM_HISTORY_FILE, POINT_HISTORY_FILE
+from typing import Optional
 
+from utils import point_log, item_price_store, rollups
 
-def load_item_price_history():
-    """Load historical price data for tracked items."""
-    try:
-        with open(ITEM_HISTORY_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
-    except json.JSONDecodeError:
-        print("❌ item_price_history.json is invalid.")
-        return {}
+# Raw item history is written this often; charts move on at the same pace
+ITEM_HISTORY_INTERVAL = 30 * 60
 
-def log_item_price(item_key, price):
-    timestamp = int(time.time())
 
-    try:
-        with open(ITEM_HISTORY_FILE, "r", encoding="utf-8") as f:
-            history = json.load(f)
-    except FileNotFoundError:
-        history = {}
+def log_item_prices(prices: dict, timestamp: Optional[int] = None):
+    """Append one sample per item; each is an O(1) append to that item's columns."""
+    timestamp = timestamp or int(time.time())
+    for item_key, price in prices.items():
+        item_price_store.append(item_key, price, timestamp)
 
-    if item_key not in history:
-        history[item_key] = []
+def roll_up_item_prices(prices: dict, timestamp: Optional[int] = None):
+    """Fold a sweep's prices into the 5m/1h/1d candles (one transaction for the whole sweep)."""
+    timestamp = timestamp or int(time.time())
+    rollups.fold_many({rollups.item_series(key): [(timestamp, price)] for key, price in prices.items()})
 
-    history[item_key].append({"timestamp": timestamp, "price": price})
-
-    # Prune to 7 days
-    cutoff = timestamp - 7 * 86400
-    history[item_key] = [entry for entry in history[item_key] if entry["timestamp"] >= cutoff]
-
-    with open(ITEM_HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(history, f, indent=2)
-
-def log_point_price(price):
-    log_entry = {"timestamp": int(time.time()), "price": price}
-
-    # Load existing history
-    try:
-        with open(POINT_HISTORY_FILE, "r", encoding="utf-8") as f:
-            history = json.load(f)
-    except FileNotFoundError:
-        history = []
-
-    # Add new entry
-    history.append(log_entry)
-
-    # Prune entries older than 24h (86400 seconds)
-    cutoff = int(time.time()) - 86400
-    history = [entry for entry in history if entry["timestamp"] >= cutoff]
-
-    with open(POINT_HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(history, f, indent=2)
+def log_point_price(price, timestamp: Optional[int] = None):
+    # O(1) append; segments older than 24h are rotated out by the point log itself
+    timestamp = timestamp or int(time.time())
+    point_log.append(price, timestamp)
+    rollups.fold_sample(rollups.POINTS_SERIES, price, timestamp)
 
+def get_price_history(item_key: Optional[str], days: float) -> dict:
+    """
+    Item (or, with item_key=None, point) prices over the last `days` at an
+    automatically picked resolution. The series stops at the last
+    ITEM_HISTORY_INTERVAL boundary and only holds closed candles, so a chart of
+    it (and its cache key) stays the same until the next boundary.
+    """
+    series = rollups.item_series(item_key) if item_key else rollups.POINTS_SERIES
+    now = int(time.time())
+    return rollups.get_series(series, int(days * 86400), closed_before=now - now % ITEM_HISTORY_INTERVAL)
 
 
 def trim_item_price_history(days_to_keep=7):
-    try:
-        with open(ITEM_HISTORY_FILE, "r", encoding="utf-8") as f:
-            full_history = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        print("[Trim] No valid history file found.")
-        return
-
-    cutoff = int((datetime.utcnow() - timedelta(days=days_to_keep)).timestamp())
-    trimmed_history = {}
-
-    for item, entries in full_history.items():
-        trimmed = [entry for entry in entries if entry["timestamp"] >= cutoff]
-        if trimmed:
-            trimmed_history[item] = trimmed
-
-    with open(ITEM_HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(trimmed_history, f, indent=2)
+    item_price_store.trim(days_to_keep)
+    rollups.trim_candles()
 
     print("[Trim] Item price history trimmed to the last", days_to_keep, "days.")
@@ -0,0 +1,154 @@
+"""
+Columnar item price history.
+
+Each item has a pair of int64 columns (timestamps, prices) split into daily
+segment files: `<ITEM_HISTORY_DIR>/<item>/<segment_start>.ts` and `.px`.
+Appending a sample writes 8 bytes to each column; reads memory-map only the
+segments covering the requested window and hand back NumPy arrays, so
+charting, trimming and statistics never build per-sample Python objects.
+"""
+import os
+import time
+import struct
+from typing import Optional
+from urllib.parse import quote, unquote
+
+from constants import ITEM_HISTORY_DIR
+
+SEGMENT_SECONDS = 86400
+# Little-endian int64; NumPy is imported lazily by the readers
+DTYPE = "<i8"
+VALUE = struct.Struct("<q")
+RETENTION_DAYS = 7
+
+
+def _item_dir(item_key: str) -> str:
+    return os.path.join(ITEM_HISTORY_DIR, quote(item_key, safe=""))
+
+
+def _segment_paths(item_key: str, segment_start: int) -> tuple:
+    base = os.path.join(_item_dir(item_key), str(segment_start))
+    return base + ".ts", base + ".px"
+
+
+def _segments(item_key: str) -> list:
+    """Segment start times for an item, oldest first."""
+    directory = _item_dir(item_key)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(int(name[:-3]) for name in os.listdir(directory) if name.endswith(".ts") and name[:-3].isdigit())
+
+
+def list_items() -> list:
+    if not os.path.isdir(ITEM_HISTORY_DIR):
+        return []
+    return sorted(unquote(name) for name in os.listdir(ITEM_HISTORY_DIR))
+
+
+def _append_column(path: str, value: int, records: int):
+    with open(path, "ab") as f:
+        # Keep both columns the same length if a crash tore one of them
+        if f.tell() != records * VALUE.size:
+            f.truncate(records * VALUE.size)
+        f.write(VALUE.pack(value))
+
+
+def append(item_key: str, price: int, timestamp: Optional[int] = None):
+    timestamp = timestamp or int(time.time())
+    segment_start = timestamp - timestamp % SEGMENT_SECONDS
+    ts_path, px_path = _segment_paths(item_key, segment_start)
+
+    os.makedirs(_item_dir(item_key), exist_ok=True)
+    records = min(
+        os.path.getsize(ts_path) if os.path.exists(ts_path) else 0,
+        os.path.getsize(px_path) if os.path.exists(px_path) else 0
+    ) // VALUE.size
+    _append_column(ts_path, timestamp, records)
+    _append_column(px_path, price, records)
+
+
+def _read_column(path: str, records: int):
+    import numpy as np
+
+    return np.fromfile(path, dtype=DTYPE, count=records) if records else np.empty(0, dtype=DTYPE)
+
+
+def append_many(item_key: str, timestamps, prices):
+    """
+    Bulk merge (e.g. for migrations); inputs need not be sorted. Samples whose
+    timestamp is already stored are skipped, and each touched segment is
+    rewritten in timestamp order through temporary files, so an interrupted
+    import can simply be run again.
+    """
+    import numpy as np
+
+    timestamps = np.asarray(timestamps, dtype=DTYPE)
+    prices = np.asarray(prices, dtype=DTYPE)
+    segment_starts = timestamps - timestamps % SEGMENT_SECONDS
+    os.makedirs(_item_dir(item_key), exist_ok=True)
+
+    for start in np.unique(segment_starts).tolist():
+        ts_path, px_path = _segment_paths(item_key, start)
+        records = 0
+        if os.path.exists(ts_path) and os.path.exists(px_path):
+            records = min(os.path.getsize(ts_path), os.path.getsize(px_path)) // VALUE.size
+
+        in_segment = segment_starts == start
+        all_ts = np.concatenate([_read_column(ts_path, records), timestamps[in_segment]])
+        all_px = np.concatenate([_read_column(px_path, records), prices[in_segment]])
+        # np.unique keeps the first occurrence, so what is already stored wins; the result is sorted
+        merged_ts, first = np.unique(all_ts, return_index=True)
+        if merged_ts.size == records:
+            continue
+
+        merged_ts.tofile(ts_path + ".tmp")
+        all_px[first].tofile(px_path + ".tmp")
+        os.replace(px_path + ".tmp", px_path)
+        os.replace(ts_path + ".tmp", ts_path)
+
+
+def _map_column(path: str, records: int):
+    import numpy as np
+
+    if records == 0:
+        return np.empty(0, dtype=DTYPE)
+    return np.memmap(path, dtype=DTYPE, mode="r", shape=(records,))
+
+
+def read(item_key: str, since: Optional[int] = None, until: Optional[int] = None) -> tuple:
+    """(timestamps, prices) int64 arrays for the item, oldest first, within [since, until]."""
+    import numpy as np
+
+    since = since or 0
+    until = until if until is not None else np.iinfo(DTYPE).max
+    ts_parts, px_parts = [], []
+
+    for start in _segments(item_key):
+        if start + SEGMENT_SECONDS <= since or start > until:
+            continue
+        ts_path, px_path = _segment_paths(item_key, start)
+        records = min(os.path.getsize(ts_path), os.path.getsize(px_path)) // VALUE.size
+        ts = _map_column(ts_path, records)
+        px = _map_column(px_path, records)
+        lo, hi = np.searchsorted(ts, since, "left"), np.searchsorted(ts, until, "right")
+        if hi > lo:
+            ts_parts.append(ts[lo:hi])
+            px_parts.append(px[lo:hi])
+
+    if not ts_parts:
+        return np.empty(0, dtype=DTYPE), np.empty(0, dtype=DTYPE)
+    return np.concatenate(ts_parts), np.concatenate(px_parts)
+
+
+def trim(days_to_keep: int = RETENTION_DAYS, now: Optional[int] = None):
+    """Delete whole segments that end before the cutoff; reads already ignore older samples."""
+    cutoff = (now or int(time.time())) - days_to_keep * 86400
+    for item_key in list_items():
+        for start in _segments(item_key):
+            if start + SEGMENT_SECONDS <= cutoff:
+                for path in _segment_paths(item_key, start):
+                    if os.path.exists(path):
+                        os.remove(path)
+        directory = _item_dir(item_key)
+        if os.path.isdir(directory) and not os.listdir(directory):
+            os.rmdir(directory)
@@ -0,0 +1,203 @@
+"""
+One-shot import of the legacy /mnt/data JSON state files into the SQLite database.
+
+Each file is imported inside a single transaction and then renamed to
+`<name>.migrated`, so a crash mid-import leaves the JSON untouched and the next
+start simply retries. Price history goes to the file-based stores instead, whose
+bulk imports skip samples they already hold, so a retry never duplicates them. Run automatically by utils.storage.initialise_database(),
+or by hand with `python -m utils.json_migration`.
+"""
+import os
+import json
+from datetime import datetime, timedelta, timezone
+
+from constants import ITEM_HISTORY_FILE, POINT_HISTORY_FILE, THRESHOLDS_FILE
+from utils.storage import get_connection
+from utils import point_log, item_price_store
+
+
+def _load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _put_setting(conn, key, value):
+    conn.execute(
+        "INSERT INTO settings (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, json.dumps(value))
+    )
+
+
+def _migrate_bank(conn, path):
+    data = _load_json(path)
+    conn.executemany(
+        "INSERT INTO bank_balances (user_id, balance) VALUES (?, ?) "
+        "ON CONFLICT(user_id) DO UPDATE SET balance = excluded.balance",
+        [(int(user_id), int(balance)) for user_id, balance in data.items()]
+    )
+    return len(data)
+
+
+def _migrate_tracked_items(conn, path):
+    data = _load_json(path)
+    conn.execute("DELETE FROM tracked_items")
+    conn.executemany(
+        "INSERT INTO tracked_items (item_key, item_id, buy, sell, position) VALUES (?, ?, ?, ?, ?)",
+        [
+            (key, int(info["item_id"]), info.get("buy"), info.get("sell"), position)
+            for position, (key, info) in enumerate(data.items())
+        ]
+    )
+    return len(data)
+
+
+def _migrate_item_history(conn, path):
+    # Item prices live in the columnar item price store, not the database
+    data = _load_json(path)
+    count = 0
+    for item_key, entries in data.items():
+        item_price_store.append_many(
+            item_key.lower(), [e["timestamp"] for e in entries], [e["price"] for e in entries]
+        )
+        count += len(entries)
+    return count
+
+
+def _migrate_point_history(conn, path):
+    # Point prices live in the append-only point log, not the database
+    data = _load_json(path)
+    point_log.append_many((int(entry["timestamp"]), int(entry["price"])) for entry in data)
+    return len(data)
+
+
+def _migrate_point_thresholds(conn, path):
+    data = _load_json(path)
+    _put_setting(conn, "point_thresholds", {"buy": data.get("buy"), "sell": data.get("sell")})
+    return 1
+
+
+def _migrate_insurance_timestamp(conn, path):
+    with open(path, "r", encoding="utf-8") as f:
+        _put_setting(conn, "happy_insurance_last_timestamp", int(f.read().strip() or "0"))
+    return 1
+
+
+def _coverage_end_epoch(timestamp, coverage_end) -> int:
+    """Old logs kept coverage end as an ISO string (or not at all); it's an epoch now."""
+    if isinstance(coverage_end, str) and coverage_end:
+        return int(datetime.fromisoformat(coverage_end).timestamp())
+    if coverage_end:
+        return int(coverage_end)
+    return int((datetime.fromtimestamp(timestamp, tz=timezone.utc) + timedelta(hours=3)).timestamp())
+
+
+def _migrate_insurance_logs(conn, path):
+    data = _load_json(path)
+    rows = [
+        (
+            log.get("sender_id"),
+            int(log["timestamp"]),
+            _coverage_end_epoch(int(log["timestamp"]), log.get("coverage_end")),
+            log.get("message")
+        )
+        for log in data
+    ]
+    conn.executemany(
+        "INSERT INTO insurance_log (sender_id, timestamp, coverage_end, message) VALUES (?, ?, ?, ?)",
+        sorted(rows, key=lambda row: row[1])
+    )
+    return len(rows)
+
+
+def _migrate_trains(conn, path):
+    data = _load_json(path)
+    conn.execute(
+        "UPDATE train_tracker SET trains_bought = ?, trains_received = ?, cost_per_train = ?, "
+        "latest_log_timestamp = ? WHERE id = 1",
+        (
+            data.get("trains_bought", 0),
+            data.get("trains_received", 0),
+            data.get("cost_per_train", 0),
+            data.get("latest_log_timestamp", 0)
+        )
+    )
+    return 1
+
+
+def _migrate_shoplifting(conn, path):
+    data = _load_json(path)
+    conn.executemany("INSERT OR IGNORE INTO shoplifting_alerted (shop) VALUES (?)", [(shop,) for shop in data])
+    return len(data)
+
+
+def _migrate_war_log(conn, path):
+    from utils.war_archive import insert_war_sample
+
+    data = _load_json(path)
+    history = sorted(data.get("history", []), key=lambda entry: entry["timestamp"])
+    for entry in history:
+        sample = {
+            "war_id": data["war_id"],
+            "factions": data.get("factions"),
+            "start": data.get("start"),
+            "current_hour": entry["current_hour"],
+            "your_score": entry["your_score"],
+            "current_lead": entry["lead"],
+            "starting_goal": entry.get("target")
+        }
+        insert_war_sample(conn, sample, entry.get("predicted_end"), entry["timestamp"])
+    return len(history)
+
+
+def _legacy_files():
+    from utils.bank import BANK_FILE
+    from utils.tracked_items import COMBINED_TRACKED_ITEMS_FILE
+    from utils.happy_insurance import HAPPY_INSURANCE_FILE, HAPPY_INSURANCE_LOG_FILE
+    from utils.trains_tracker import TRAINS_FILE
+    from utils.shoplifting import ALERT_FILE_PATH
+    from utils.war_archive import LEGACY_WAR_LOG_FILE
+
+    return [
+        (BANK_FILE, _migrate_bank),
+        (COMBINED_TRACKED_ITEMS_FILE, _migrate_tracked_items),
+        (ITEM_HISTORY_FILE, _migrate_item_history),
+        (POINT_HISTORY_FILE, _migrate_point_history),
+        (THRESHOLDS_FILE, _migrate_point_thresholds),
+        (HAPPY_INSURANCE_FILE, _migrate_insurance_timestamp),
+        (HAPPY_INSURANCE_LOG_FILE, _migrate_insurance_logs),
+        (TRAINS_FILE, _migrate_trains),
+        (ALERT_FILE_PATH, _migrate_shoplifting),
+        (LEGACY_WAR_LOG_FILE, _migrate_war_log),
+    ]
+
+
+def migrate_json_files() -> dict:
+    """Import every legacy JSON file that is still present. Returns {path: rows imported}."""
+    conn = get_connection()
+    migrated = {}
+
+    for path, migrate in _legacy_files():
+        if not os.path.exists(path):
+            continue
+        marker = f"migrated:{path}"
+        try:
+            already_done = conn.execute("SELECT 1 FROM settings WHERE key = ?", (marker,)).fetchone()
+            if already_done:
+                # Imported before but the rename didn't happen; don't import twice
+                os.replace(path, path + ".migrated")
+                continue
+
+            with conn:
+                count = migrate(conn, path)
+                _put_setting(conn, marker, count)
+            os.replace(path, path + ".migrated")
+            migrated[path] = count
+            print(f"📦 Migrated {count} record(s) from {path}")
+        except Exception as e:
+            print(f"❌ Failed to migrate {path}: {e}")
+
+    return migrated
+
+
+if __name__ == "__main__":
+    migrate_json_files()
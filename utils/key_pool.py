@@ -0,0 +1,129 @@
+import time
+import asyncio
+from collections import deque
+from typing import Optional
+
+from constants import API_KEYS, API_KEY_REQUESTS_PER_MINUTE, get_api_key
+
+RATE_WINDOW_SECONDS = 60
+
+# Selections that answer for the key's owner (their log, their faction) must never
+# borrow another member's key, so these purposes don't spill over.
+OWNER_SCOPED_PURPOSES = {"logs", "war"}
+# Wait queue for every purpose that may use any key
+SHARED_QUEUE = "shared"
+
+
+class KeyPool:
+    """
+    Hands out Torn API keys by purpose while keeping each key under its
+    per-minute budget. Every key has a sliding window of request times; when a
+    purpose's own key is full the call spills over to the idlest other key.
+    Callers that find nothing usable wait in FIFO order in their own queue: one
+    per key for owner-scoped purposes, one shared queue for the rest. A full
+    owner key therefore never holds up callers that can use another key.
+    """
+
+    def __init__(self, limit: int = API_KEY_REQUESTS_PER_MINUTE, window: float = RATE_WINDOW_SECONDS):
+        self.limit = limit
+        self.window = window
+        self._usage = {}  # api key -> deque of monotonic request times
+        self._queues = {}  # queue name -> asyncio.Lock; asyncio locks wake waiters in FIFO order
+
+    def _keys(self) -> list:
+        """Distinct configured keys; several purposes may share one key and one budget."""
+        seen = []
+        for key in API_KEYS.values():
+            if key and key not in seen:
+                seen.append(key)
+        return seen
+
+    def _window(self, key: str, now: float) -> deque:
+        stamps = self._usage.setdefault(key, deque())
+        while stamps and stamps[0] <= now - self.window:
+            stamps.popleft()
+        return stamps
+
+    def remaining(self, key: str, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        return max(0, self.limit - len(self._window(key, now)))
+
+    def _queue(self, purpose: str, reserve: int) -> str:
+        queue = get_api_key(purpose) if purpose in OWNER_SCOPED_PURPOSES else SHARED_QUEUE
+        # Background callers queue separately, so they never sit ahead of regular ones
+        return f"{queue}:background" if reserve else queue
+
+    def _has_owner_waiters(self, key: str) -> bool:
+        lock = self._queues.get(key)
+        return lock is not None and lock.locked()
+
+    def _candidates(self, purpose: str) -> list:
+        if purpose in OWNER_SCOPED_PURPOSES:
+            return [get_api_key(purpose)]
+        # Free slots on a key its owner is queueing for go to the owner first
+        return [k for k in self._keys() if not self._has_owner_waiters(k)]
+
+    def _try_take(self, purpose: str, now: float, reserve: int = 0) -> Optional[str]:
+        preferred = get_api_key(purpose)
+        usable = self._candidates(purpose)
+        candidates = [preferred] if preferred in usable else []
+        candidates += sorted((k for k in usable if k != preferred), key=lambda k: -self.remaining(k, now))
+
+        for key in candidates:
+            if self.remaining(key, now) > reserve:
+                self._usage[key].append(now)
+                return key
+        return None
+
+    def _next_free_in(self, purpose: str, now: float, reserve: int = 0) -> float:
+        waits = []
+        for key in self._candidates(purpose):
+            stamps = self._window(key, now)
+            # More than `reserve` slots are free once this request time leaves the window
+            expiring = len(stamps) - (self.limit - reserve)
+            if expiring >= 0:
+                waits.append(stamps[expiring] + self.window - now)
+        return max(min(waits, default=0.05), 0.05)
+
+    async def acquire(self, purpose: str = "default", reserve: int = 0) -> str:
+        """
+        Reserve one request slot and return the key to use for it. Background work
+        passes `reserve` to only take a slot while more than that many remain on
+        the key, leaving headroom for everything else.
+        """
+        if not get_api_key(purpose):
+            raise RuntimeError(f"No Torn API key configured for '{purpose}' (or TORN_API_KEY)")
+
+        reserve = min(reserve, self.limit - 1)
+        lock = self._queues.setdefault(self._queue(purpose, reserve), asyncio.Lock())
+        if not lock.locked():
+            key = self._try_take(purpose, time.monotonic(), reserve)
+            if key:
+                return key
+
+        # Only this queue's head sleeps; the rest of the queue waits behind it in arrival order
+        async with lock:
+            while True:
+                now = time.monotonic()
+                key = self._try_take(purpose, now, reserve)
+                if key:
+                    return key
+                await asyncio.sleep(self._next_free_in(purpose, now, reserve))
+
+    def mark_exhausted(self, key: str):
+        """Torn said this key is over its limit; treat its window as full."""
+        now = time.monotonic()
+        stamps = self._window(key, now)
+        while len(stamps) < self.limit:
+            stamps.append(now)
+
+    def stats(self) -> dict:
+        """Requests used in the current window, per purpose."""
+        now = time.monotonic()
+        return {
+            purpose: self.limit - self.remaining(key, now)
+            for purpose, key in API_KEYS.items() if key
+        }
+
+
+key_pool = KeyPool()
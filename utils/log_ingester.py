@@ -0,0 +1,205 @@
+import time
+import asyncio
+import inspect
+from typing import Optional
+
+from utils.torn_api import fetch_user_log
+from utils.storage import get_setting, set_setting
+
+# Torn returns at most this many log entries per request
+LOG_PAGE_SIZE = 100
+
+# Backfill splits the gap into windows fetched in parallel, each paged backwards
+BACKFILL_WINDOW_SECONDS = 6 * 3600
+BACKFILL_CONCURRENCY = 4
+BACKFILL_MAX_DAYS = 30
+# Backfill requests leave this many requests per minute on the owner's key for live work
+BACKFILL_KEY_RESERVE = 30
+
+# title -> list of handlers; each handler gets the new entries for that title, oldest first
+_handlers = {}
+
+
+def register_log_handler(title: str, handler):
+    """Register a (sync or async) handler for log entries with the given title, e.g. "Item receive"."""
+    _handlers.setdefault(title, []).append(handler)
+
+
+def load_cursor() -> dict:
+    """
+    Last processed log timestamp plus the ids already seen at that exact second
+    (Torn's `from` filter is inclusive, so the boundary second comes back each time).
+    """
+    cursor = get_setting("log_cursor")
+    if cursor is not None:
+        return cursor
+
+    start = _legacy_start_timestamp()
+    if start is None:
+        # Nothing has ever been processed: start from now instead of replaying old logs
+        start = int(time.time())
+        print("ℹ️ No log cursor or feature timestamps yet; reading the user log from now on.")
+    cursor = {"last_timestamp": start, "seen_ids": []}
+    save_cursor(cursor)
+    return cursor
+
+
+def save_cursor(cursor: dict):
+    set_setting("log_cursor", cursor)
+
+
+def _legacy_start_timestamp() -> Optional[int]:
+    """
+    Oldest per-feature timestamp that has been recorded, so nothing is skipped on
+    first run; None when no feature has processed a log entry yet.
+    """
+    from utils.trains_tracker import load_train_data
+    from utils.happy_insurance import load_last_timestamp
+
+    try:
+        recorded = [load_train_data().get("latest_log_timestamp", 0), load_last_timestamp()]
+    except Exception as e:
+        print(f"⚠️ Could not read legacy log timestamps: {e}")
+        return None
+    return min((ts for ts in recorded if ts), default=None)
+
+
+def select_new_entries(logs: dict, cursor: dict) -> list:
+    """Entries newer than the cursor, deduped by log id, oldest first."""
+    last_ts = cursor.get("last_timestamp", 0)
+    seen = set(cursor.get("seen_ids", []))
+    new_entries = []
+
+    for log_id, entry in logs.items():
+        ts = entry.get("timestamp", 0)
+        if ts < last_ts or (ts == last_ts and log_id in seen):
+            continue
+        new_entries.append(dict(entry, id=log_id))
+
+    new_entries.sort(key=lambda e: e.get("timestamp", 0))
+    return new_entries
+
+
+def advance_cursor(cursor: dict, entries: list) -> dict:
+    if not entries:
+        return cursor
+    newest = entries[-1]["timestamp"]
+    seen = set(cursor.get("seen_ids", [])) if newest == cursor.get("last_timestamp") else set()
+    seen.update(e["id"] for e in entries if e["timestamp"] == newest)
+    return {"last_timestamp": newest, "seen_ids": sorted(seen)}
+
+
+def _title_runs(entries: list) -> list:
+    """Consecutive entries (oldest first) grouped into runs that share a title."""
+    runs = []
+    for entry in entries:
+        if runs and runs[-1][0].get("title") == entry.get("title"):
+            runs[-1].append(entry)
+        else:
+            runs.append([entry])
+    return runs
+
+
+async def dispatch_entries(cursor: dict, entries: list) -> int:
+    """
+    Hand entries to the handlers registered for their title, a run of same-title
+    entries at a time, in log order. The cursor is saved up to the last run that
+    every handler accepted; a handler's exception propagates, so the failed run
+    and everything after it are offered again on the next poll.
+    """
+    done = 0
+    try:
+        for run in _title_runs(entries):
+            for handler in _handlers.get(run[0].get("title"), []):
+                result = handler(run)
+                if inspect.isawaitable(result):
+                    await result
+            done += len(run)
+    finally:
+        if done:
+            save_cursor(advance_cursor(cursor, entries[:done]))
+    return done
+
+
+async def ingest_new_logs() -> int:
+    """
+    Fetch only log entries since the cursor (filtered server-side with `from`),
+    dispatch them to the registered handlers and advance the cursor.
+    Returns the number of new entries.
+    """
+    cursor = load_cursor()
+    logs = await fetch_user_log({"from": cursor.get("last_timestamp", 0)})
+
+    if len(logs) >= LOG_PAGE_SIZE:
+        # A full page means older entries past the cursor may be cut off
+        print("⚠️ Log page is full, switching to backfill.")
+        return await backfill_logs()
+
+    new_entries = select_new_entries(logs, cursor)
+    if not new_entries:
+        return 0
+
+    return await dispatch_entries(cursor, new_entries)
+
+
+async def fetch_log_window(start_ts: int, end_ts: int) -> dict:
+    """Every entry between start_ts and end_ts, paging backwards with `to` while pages come back full."""
+    collected = {}
+    to_ts = end_ts
+
+    while True:
+        page = await fetch_user_log({"from": start_ts, "to": to_ts}, reserve=BACKFILL_KEY_RESERVE)
+        collected.update(page)
+        if len(page) < LOG_PAGE_SIZE:
+            return collected
+
+        oldest = min(entry.get("timestamp", 0) for entry in page.values())
+        if oldest <= start_ts:
+            return collected
+        # `to` is inclusive; re-reading the oldest second is deduped by log id.
+        # If a whole page shares one second, step past it rather than loop forever.
+        to_ts = oldest if oldest < to_ts else oldest - 1
+
+
+async def backfill_logs(progress=None) -> int:
+    """
+    Catch up on everything since the cursor after a restart or outage.
+    The gap is split into windows fetched with bounded concurrency; `progress`
+    (optional, sync or async) is called with (windows_done, windows_total, entries_found).
+    Returns the number of new entries dispatched.
+    """
+    cursor = load_cursor()
+    now = int(time.time())
+    start_ts = max(cursor.get("last_timestamp", 0), now - BACKFILL_MAX_DAYS * 86400)
+
+    windows = []
+    window_start = start_ts
+    while window_start <= now:
+        window_end = min(window_start + BACKFILL_WINDOW_SECONDS, now)
+        windows.append((window_start, window_end))
+        window_start = window_end + 1
+
+    semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+    merged = {}
+    done = 0
+
+    async def run_window(window):
+        nonlocal done
+        async with semaphore:
+            page = await fetch_log_window(*window)
+        merged.update(page)
+        done += 1
+        print(f"⏪ Log backfill: {done}/{len(windows)} windows, {len(merged)} entries")
+        if progress:
+            result = progress(done, len(windows), len(merged))
+            if inspect.isawaitable(result):
+                await result
+
+    await asyncio.gather(*(run_window(window) for window in windows))
+
+    new_entries = select_new_entries(merged, cursor)
+    if new_entries:
+        await dispatch_entries(cursor, new_entries)
+
+    print(f"✅ Log backfill complete: {len(new_entries)} new entries since {start_ts}.")
+    return len(new_entries)
@@ -0,0 +1,114 @@
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from discord.ext import tasks
+
+from constants import MARKET_POLL_SECONDS, get_api_key
+from utils.tracked_items import load_combined_items_data
+from utils.torn_api import fetch_lowest_item_listing, fetch_lowest_item_listings
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    item_key: str
+    item_id: int
+    price: Optional[int]      # None when nothing is listed
+    quantity: Optional[int]
+    fetched_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class MarketFeed:
+    """
+    Owns item market polling. Keeps the latest snapshot per tracked item in
+    memory and publishes it to subscribers, so alerting, history logging and
+    slash commands share one set of API calls.
+    """
+
+    def __init__(self):
+        self._latest = {}
+        self._subscribers = []        # async fn(snapshot, item_info), called as each item lands
+        self._sweep_subscribers = []  # async fn(snapshots: dict), called after each full sweep
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def subscribe_sweep(self, callback):
+        self._sweep_subscribers.append(callback)
+
+    def latest(self, item_key: str, max_age: Optional[float] = None) -> Optional[MarketSnapshot]:
+        snapshot = self._latest.get(item_key)
+        if snapshot is None or (max_age is not None and snapshot.age > max_age):
+            return None
+        return snapshot
+
+    def snapshots(self) -> dict:
+        return dict(self._latest)
+
+    async def _publish(self, callbacks, *payload):
+        for callback in callbacks:
+            try:
+                await callback(*payload)
+            except Exception as e:
+                print(f"[Market feed] Subscriber {getattr(callback, '__name__', callback)} failed: {e}")
+
+    async def poll(self, items: dict):
+        """Refresh every item in `items` (key -> {"item_id": ...}) and notify subscribers."""
+        item_ids = {key: info.get("item_id") for key, info in items.items()}
+        swept = {}
+
+        async for key, listing, error in fetch_lowest_item_listings(item_ids):
+            if error:
+                print(f"[Error checking price for {key.title()}] {error}")
+                continue
+            snapshot = MarketSnapshot(
+                item_key=key,
+                item_id=item_ids[key],
+                price=listing.price if listing else None,
+                quantity=listing.amount if listing else None,
+                fetched_at=time.time()
+            )
+            self._latest[key] = snapshot
+            swept[key] = snapshot
+            await self._publish(self._subscribers, snapshot, items[key])
+
+        # Forget items that are no longer tracked
+        for key in set(self._latest) - set(items):
+            del self._latest[key]
+
+        await self._publish(self._sweep_subscribers, swept)
+
+    async def get(self, item_key: str, item_id, max_age: float = MARKET_POLL_SECONDS * 2) -> MarketSnapshot:
+        """Latest snapshot if it is fresh enough, otherwise fetch this one item now."""
+        snapshot = self.latest(item_key, max_age=max_age)
+        if snapshot:
+            return snapshot
+
+        # Concurrent /check_item_price calls for the same item share one request
+        listing = await fetch_lowest_item_listing(item_id, max_age=max_age)
+        snapshot = MarketSnapshot(
+            item_key=item_key,
+            item_id=item_id,
+            price=listing.price if listing else None,
+            quantity=listing.amount if listing else None,
+            fetched_at=time.time()
+        )
+        self._latest[item_key] = snapshot
+        return snapshot
+
+
+market_feed = MarketFeed()
+
+
+@tasks.loop(seconds=MARKET_POLL_SECONDS)
+async def market_poll_loop(bot):
+    await bot.wait_until_ready()
+
+    if not get_api_key("items"):
+        return
+
+    await market_feed.poll(load_combined_items_data())
@@ -1,10 +1,84 @@
-from utils.tracked_items import load_combined_items_data
+from typing import Optional
+
+from utils import tracked_items
+
+# Common shorthand used in the faction; only applies when the target item is tracked
+ITEM_ALIASES = {
+    "xan": "xanax",
+    "xans": "xanax",
+    "edvd": "erotic dvds",
+    "edvds": "erotic dvds",
+    "fhc": "feathery hotel coupon",
+    "fhcs": "feathery hotel coupon",
+    "bct": "business class ticket",
+    "mistletoe": "poison mistle toe",
+}
+
+
+def canonical_name(name: str) -> str:
+    """Lower-case, underscores as spaces, single spaces: "Erotic_DVDs " -> "erotic dvds"."""
+    return " ".join(str(name).replace("_", " ").lower().split())
+
+
+def _name_variants(key: str) -> set:
+    """Canonical form of a key plus its singular/plural spelling."""
+    base = canonical_name(key)
+    variants = {base}
+    if base.endswith("s"):
+        variants.add(base[:-1])
+    else:
+        variants.add(base + "s")
+    return variants
+
+
+class ItemResolver:
+    """
+    Resolves user input (name, alias, plural or Torn item ID) to a tracked item key
+    with O(1) dict lookups. The indexes are rebuilt only when the tracked items
+    config hands out a new view, i.e. when the config has changed.
+    """
+
+    def __init__(self):
+        self._source = None
+        self._by_name = {}
+        self._by_id = {}
+
+    def _refresh(self):
+        items = tracked_items.load_combined_items_data()
+        if items is self._source:
+            return
+
+        by_name, by_id = {}, {}
+        # Exact names win over plural/singular variants and aliases
+        for key in items:
+            for variant in _name_variants(key):
+                by_name.setdefault(variant, key)
+        for key in items:
+            by_name[canonical_name(key)] = key
+        for alias, target in ITEM_ALIASES.items():
+            if target in by_name:
+                by_name.setdefault(alias, by_name[target])
+        for key, info in items.items():
+            by_id[str(info.get("item_id"))] = key
+
+        self._by_name, self._by_id, self._source = by_name, by_id, items
+
+    def resolve(self, name) -> Optional[str]:
+        """Tracked item key for `name`, or None if it isn't tracked."""
+        self._refresh()
+        text = str(name).strip()
+        if text.isdigit():
+            return self._by_id.get(text)
+        return self._by_name.get(canonical_name(text))
+
+    def key_for_id(self, item_id) -> Optional[str]:
+        self._refresh()
+        return self._by_id.get(str(item_id).strip())
+
+
+item_resolver = ItemResolver()
 
 
 def normalise_item_name(name: str) -> str:
     """Resolve item name or ID to its internal key (case-insensitive)."""
-    items = load_combined_items_data()
-    for display_name, data in items.items():
-        if name.lower().strip() == display_name.lower() or name.lower().strip() == str(data.get("item_id")):
-            return display_name
-    return name.strip()
+    return item_resolver.resolve(name) or canonical_name(name)
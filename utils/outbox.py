@@ -0,0 +1,171 @@
+"""
+Outbound Discord message queue.
+
+Alert producers call `outbox.post(channel_name, text, title=...)` instead of
+`channel.send`. Posts land in a per-channel queue that is flushed every
+OUTBOX_FLUSH_SECONDS. Everything queued for a channel in that tick becomes one
+message, with one embed per title. Repeats of a dedupe key that is still queued,
+or was delivered within the cooldown, are dropped. Each channel is held to
+Discord's per-channel send limit, so a burst waits in the queue instead of
+hitting a 429.
+"""
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+import discord
+from discord.ext import tasks
+
+from constants import OUTBOX_FLUSH_SECONDS, OUTBOX_COOLDOWN
+
+# Discord allows 5 messages per 5 seconds per channel
+CHANNEL_LIMIT = 5
+CHANNEL_PERIOD = 5.0
+# Discord embed limits, with some headroom
+MAX_DESCRIPTION = 4000
+MAX_EMBEDS = 10
+MAX_MESSAGE_CHARS = 5800
+
+
+@dataclass
+class Alert:
+    title: str
+    text: str
+    colour: Optional[int] = None
+    dedupe_key: Optional[str] = None
+
+
+class ChannelBucket:
+    """Sliding window: `take()` succeeds at most CHANNEL_LIMIT times in any CHANNEL_PERIOD seconds."""
+
+    def __init__(self):
+        self._sent = deque()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        while self._sent and self._sent[0] <= now - CHANNEL_PERIOD:
+            self._sent.popleft()
+        if len(self._sent) >= CHANNEL_LIMIT:
+            return False
+        self._sent.append(now)
+        return True
+
+
+def build_embeds(alerts: list) -> list:
+    """One embed per title (split if the description would overflow), in first-seen order."""
+    groups = {}
+    for alert in alerts:
+        groups.setdefault((alert.title, alert.colour), []).append(alert.text)
+
+    embeds = []
+    for (title, colour), texts in groups.items():
+        separator = "\n\n" if any("\n" in text for text in texts) else "\n"
+        description = ""
+        for text in texts:
+            text = text[:MAX_DESCRIPTION]
+            if description and len(description) + len(separator) + len(text) > MAX_DESCRIPTION:
+                embeds.append(discord.Embed(title=title, description=description, colour=colour))
+                description = ""
+            description = f"{description}{separator}{text}" if description else text
+        embeds.append(discord.Embed(title=title, description=description, colour=colour))
+    return embeds
+
+
+def _fits(embeds: list) -> bool:
+    size = sum(len(embed.title or "") + len(embed.description or "") for embed in embeds)
+    return len(embeds) <= MAX_EMBEDS and size <= MAX_MESSAGE_CHARS
+
+
+def build_batches(alerts: list) -> list:
+    """Split alerts (same titles kept together) into per-message batches that fit Discord's limits."""
+    groups = {}
+    for alert in alerts:
+        groups.setdefault((alert.title, alert.colour), []).append(alert)
+
+    batches = [[]]
+    for group in groups.values():
+        for alert in group:
+            if batches[-1] and not _fits(build_embeds(batches[-1] + [alert])):
+                batches.append([])
+            batches[-1].append(alert)
+    return [batch for batch in batches if batch]
+
+
+class Outbox:
+    def __init__(self, cooldown: float = OUTBOX_COOLDOWN):
+        self.cooldown = cooldown
+        self._pending = {}    # channel name -> [Alert]
+        self._last_sent = {}  # (channel name, dedupe key) -> monotonic time it was last delivered
+        self._buckets = {}    # channel name -> ChannelBucket
+
+    def post(self, channel_name: str, text: str, title: str = "", dedupe_key: Optional[str] = None,
+             cooldown: Optional[float] = None, colour: Optional[int] = None) -> bool:
+        """
+        Queue an alert; returns False if the same dedupe key is already queued or
+        was delivered within the cooldown.
+        """
+        queue = self._pending.setdefault(channel_name, [])
+        if dedupe_key is not None:
+            last = self._last_sent.get((channel_name, dedupe_key))
+            if last is not None and time.monotonic() - last < (self.cooldown if cooldown is None else cooldown):
+                return False
+            if any(alert.dedupe_key == dedupe_key for alert in queue):
+                return False
+
+        queue.append(Alert(title, text, colour, dedupe_key))
+        return True
+
+    @property
+    def pending(self) -> int:
+        return sum(len(alerts) for alerts in self._pending.values())
+
+    async def flush(self, bot):
+        """Send what each channel's bucket allows; anything left waits for the next flush."""
+        for channel_name in list(self._pending):
+            alerts = self._pending.pop(channel_name)
+            if not alerts:
+                continue
+            channel = discord.utils.get(bot.get_all_channels(), name=channel_name)
+            if not channel:
+                print(f"⚠️ Channel '{channel_name}' not found; dropping {len(alerts)} alert(s).")
+                continue
+
+            bucket = self._buckets.setdefault(channel_name, ChannelBucket())
+            batches = build_batches(alerts)
+            while batches and bucket.take():
+                try:
+                    await channel.send(embeds=build_embeds(batches[0]))
+                except discord.HTTPException as e:
+                    if e.status == 429:
+                        break
+                    print(f"❌ Failed to post to '{channel_name}': {e}")
+                else:
+                    # Only delivered alerts start their cooldown
+                    now = time.monotonic()
+                    for alert in batches[0]:
+                        if alert.dedupe_key is not None:
+                            self._last_sent[(channel_name, alert.dedupe_key)] = now
+                batches.pop(0)
+
+            if batches:
+                # Rate limited: keep the rest at the front of the queue for the next flush
+                leftover = [alert for batch in batches for alert in batch]
+                self._pending[channel_name] = leftover + self._pending.get(channel_name, [])
+
+        # Forget dedupe keys once their longest plausible cooldown is over
+        cutoff = time.monotonic() - max(self.cooldown, 24 * 3600)
+        self._last_sent = {key: sent for key, sent in self._last_sent.items() if sent >= cutoff}
+
+
+outbox = Outbox()
+
+
+@tasks.loop(seconds=OUTBOX_FLUSH_SECONDS)
+async def outbox_flush_loop(bot):
+    await bot.wait_until_ready()
+
+    try:
+        await outbox.flush(bot)
+    except Exception as e:
+        print(f"[Error flushing outbound messages] {e}")
@@ -48,7 +48,17 @@ def load_job_perks():
         print("❌ job_perks_final.json is not valid JSON.")
         return {}
 
-# Load these at import time so they're available as constants
-ensure_perks_data()
-GEAR_PERKS = load_gear_perks()
-JOB_PERKS = load_job_perks()
+# Loaded on first use rather than at import, so startup doesn't pay for it
+_perks = {}
+
+def get_gear_perks():
+    if "gear" not in _perks:
+        ensure_perks_data()
+        _perks["gear"] = load_gear_perks()
+    return _perks["gear"]
+
+def get_job_perks():
+    if "job" not in _perks:
+        ensure_perks_data()
+        _perks["job"] = load_job_perks()
+    return _perks["job"]
@@ -0,0 +1,108 @@
+"""
+Append-only point price log.
+
+Samples are fixed-width binary records (int64 timestamp, int64 price) appended
+to hourly segment files, so logging a price is a single 16-byte append.
+Retention is enforced by deleting whole segments once they fall out of the
+window, and reading the last N hours only opens the segments that cover them.
+"""
+import os
+import time
+import struct
+from typing import Optional
+
+from constants import POINT_LOG_DIR
+
+RECORD = struct.Struct("<qq")
+SEGMENT_SECONDS = 3600
+RETENTION_SECONDS = 86400
+
+
+def _segment_start(timestamp: int) -> int:
+    return timestamp - timestamp % SEGMENT_SECONDS
+
+
+def _segment_path(segment_start: int) -> str:
+    return os.path.join(POINT_LOG_DIR, f"{segment_start}.bin")
+
+
+def _segments() -> list:
+    """Segment start times on disk, oldest first."""
+    if not os.path.isdir(POINT_LOG_DIR):
+        return []
+    starts = []
+    for name in os.listdir(POINT_LOG_DIR):
+        stem, ext = os.path.splitext(name)
+        if ext == ".bin" and stem.isdigit():
+            starts.append(int(stem))
+    return sorted(starts)
+
+
+def rotate(now: Optional[int] = None, retention: int = RETENTION_SECONDS):
+    """Drop every segment that ends before the retention cutoff."""
+    cutoff = (now or int(time.time())) - retention
+    for start in _segments():
+        if start + SEGMENT_SECONDS <= cutoff:
+            os.remove(_segment_path(start))
+
+
+def append(price: int, timestamp: Optional[int] = None):
+    timestamp = timestamp or int(time.time())
+    path = _segment_path(_segment_start(timestamp))
+    new_segment = not os.path.exists(path)
+
+    os.makedirs(POINT_LOG_DIR, exist_ok=True)
+    with open(path, "ab") as f:
+        # Cut off a torn record left by a crash so later records stay aligned
+        torn = f.tell() % RECORD.size
+        if torn:
+            f.truncate(f.tell() - torn)
+        f.write(RECORD.pack(timestamp, int(price)))
+
+    # Rotation only has work to do when the log rolls over to a new hour
+    if new_segment:
+        rotate(timestamp)
+
+
+def _read_segment(start: int) -> list:
+    with open(_segment_path(start), "rb") as f:
+        raw = f.read()
+    # Ignore a torn trailing record from a crash mid-append
+    usable = len(raw) - len(raw) % RECORD.size
+    return list(RECORD.iter_unpack(raw[:usable]))
+
+
+def append_many(samples):
+    """
+    Merge (timestamp, price) pairs into their segments, e.g. when importing older
+    history. Samples whose timestamp is already logged are skipped, and each
+    segment is rewritten in timestamp order through a temporary file, so an
+    interrupted import can simply be run again.
+    """
+    by_segment = {}
+    for timestamp, price in samples:
+        by_segment.setdefault(_segment_start(int(timestamp)), {})[int(timestamp)] = int(price)
+
+    os.makedirs(POINT_LOG_DIR, exist_ok=True)
+    for start, new in by_segment.items():
+        path = _segment_path(start)
+        existing = _read_segment(start) if os.path.exists(path) else []
+        merged = dict(new)
+        merged.update(existing)  # what is already logged wins
+        if len(merged) == len(existing):
+            continue
+        with open(path + ".tmp", "wb") as f:
+            f.write(b"".join(RECORD.pack(ts, price) for ts, price in sorted(merged.items())))
+        os.replace(path + ".tmp", path)
+
+    rotate()
+
+
+def read_since(since: int) -> list:
+    """(timestamp, price) pairs at or after `since`, oldest first."""
+    samples = []
+    for start in _segments():
+        if start + SEGMENT_SECONDS <= since:
+            continue
+        samples.extend(sample for sample in _read_segment(start) if sample[0] >= since)
+    return samples
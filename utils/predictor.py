@@ -1,30 +1,23 @@
 import os
 import time
-import json
-from datetime import datetime
-import numpy as np
-import requests
-import matplotlib.pyplot as plt
 from io import BytesIO
-from pathlib import Path
 from datetime import timedelta
 import math
 
 import discord
 from discord import app_commands
 
+from utils.torn_api import fetch_faction_wars
+
 
 
 # ---- Torn API fetcher ----
-def fetch_v2_war_data():
-    api_key = os.getenv("TORN_API_KEY")
+async def fetch_v2_war_data(max_age=None):
     your_faction_id = int(os.getenv("FACTION_ID"))
 
-    url = f"https://api.torn.com/v2/faction/?selections=wars&key={api_key}"
-    response = requests.get(url)
-    data = response.json()
+    wars = await fetch_faction_wars(max_age=max_age)
 
-    ranked_war = data.get("wars", {}).get("ranked")
+    ranked_war = wars.get("ranked")
     if not ranked_war:
         raise ValueError("No ranked war found")
 
@@ -59,108 +52,225 @@ def fetch_v2_war_data():
         "current_target": current_target  # ✅ label clearly
     }
 
-def predict_war_end(current_hour, current_lead, your_score, starting_score_goal):
-    lead_gain_per_hour = current_lead / current_hour if current_hour != 0 else 0
-    opponent_score = your_score - current_lead
-    hours = np.arange(current_hour, 200, 0.5)
-    target_values = starting_score_goal * (0.99) ** (hours - 24)
+# ---- War end solver ----
+# The target holds at the starting goal for 24 hours, then decays 1% per hour.
+TARGET_DECAY = 0.99
+DECAY_START_HOUR = 24
+SOLVER_ITERATIONS = 48  # bisection steps; brackets are < 10^5 h wide, so this is far below a second
+SOLVER_TOLERANCE = 1e-6  # hours; the scalar solver stops bisecting once the bracket is this narrow
 
-    if current_lead >= 0:
-        # We are winning
-        lead_values = current_lead + lead_gain_per_hour * (hours - current_hour)
-        end_index = np.argmax(lead_values >= target_values)
-    else:
-        # We are losing
-        # Track how far *behind* we are and simulate that worsening
-        loss_gap = abs(current_lead)
-        loss_increase_per_hour = loss_gap / current_hour if current_hour != 0 else 0
-        loss_values = loss_gap + loss_increase_per_hour * (hours - current_hour)
-        end_index = np.argmax(loss_values >= target_values)
-        # For consistency, treat final_lead as negative
-        lead_values = -loss_values
-
-    if end_index == 0 and all(lead_values < target_values):
+def decayed_target(starting_goal, hour):
+    """Continuous target at `hour`; works on scalars and NumPy arrays."""
+    import numpy as np
+
+    return starting_goal * TARGET_DECAY ** np.maximum(0, np.asarray(hour, dtype=float) - DECAY_START_HOUR)
+
+def solve_war_end(current_hour, current_lead, starting_goal):
+    """
+    First hour at which the projected gap reaches the decaying target, rounded up to
+    the whole minute. The gap |lead| keeps growing at its average rate so far, so it
+    is linear in time while the target falls, and the crossing is unique: it is
+    bracketed analytically and found by bisection. Accepts NumPy arrays (broadcast
+    together); returns inf where the gap never reaches the target.
+    """
+    import numpy as np
+
+    h0, lead, goal = np.broadcast_arrays(
+        np.asarray(current_hour, dtype=float),
+        np.asarray(current_lead, dtype=float),
+        np.asarray(starting_goal, dtype=float)
+    )
+    gap = np.abs(lead)
+    rate = np.divide(gap, h0, out=np.zeros_like(gap), where=h0 != 0)
+
+    def shortfall(hour):
+        return decayed_target(goal, hour) - (gap + rate * (hour - h0))
+
+    # The gap is never below its current value, so the target falling to it bounds the crossing
+    with np.errstate(divide="ignore"):
+        upper = DECAY_START_HOUR + np.log(gap / goal) / np.log(TARGET_DECAY)
+    upper = np.maximum(np.nan_to_num(upper, posinf=np.inf), h0)
+    solvable = np.isfinite(upper)
+
+    lo = h0.copy()
+    hi = np.where(solvable, upper, h0)
+    already_over = shortfall(lo) <= 0
+    for _ in range(SOLVER_ITERATIONS):
+        mid = (lo + hi) / 2
+        over = shortfall(mid) <= 0
+        hi = np.where(over, mid, hi)
+        lo = np.where(over, lo, mid)
+
+    end = np.where(already_over, h0, np.ceil(hi * 60 - 1e-6) / 60)
+    return np.where(solvable | already_over, end, np.inf)
+
+def solve_war_end_at_rate(current_hour, current_lead, lead_rate, starting_goal, horizon: int = 1000):
+    """
+    Like solve_war_end, but the lead moves at a measured signed rate (points/hour)
+    instead of its average, so it may shrink and flip sides before the war ends.
+    The first crossing is bracketed by stepping whole hours (only over scenarios
+    still running) and then bisected to the minute. Accepts NumPy arrays; inf if
+    nothing crosses within `horizon` hours.
+    """
+    import numpy as np
+
+    arrays = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (current_hour, current_lead, lead_rate, starting_goal)))
+    shape = arrays[0].shape
+    h0, lead, rate, goal = (a.ravel() for a in arrays)
+
+    def over(hour, i=slice(None)):
+        return np.abs(lead[i] + rate[i] * (hour - h0[i])) >= decayed_target(goal[i], hour)
+
+    already_over = over(h0)
+    hi = np.where(already_over, h0, np.inf)
+    running = np.flatnonzero(~already_over)
+    for step in range(1, horizon + 1):
+        if not running.size:
+            break
+        crossed = over(h0[running] + step, running)
+        hi[running[crossed]] = h0[running[crossed]] + step
+        running = running[~crossed]
+
+    solvable = np.isfinite(hi)
+    lo = np.where(solvable, np.maximum(hi - 1, h0), h0)
+    hi = np.where(solvable, hi, h0)
+    for _ in range(SOLVER_ITERATIONS // 2):  # one-hour brackets need far fewer steps
+        mid = (lo + hi) / 2
+        mid_over = over(mid)
+        hi = np.where(mid_over, mid, hi)
+        lo = np.where(mid_over, lo, mid)
+
+    end = np.where(already_over, h0, np.ceil(hi * 60 - 1e-6) / 60)
+    return np.where(solvable, end, np.inf).reshape(shape)
+
+def war_whatif_grid(current_hour, current_lead, starting_goal, your_rates, opponent_rates, horizon: int = 1000):
+    """
+    End hour and final lead for every pair of constant scoring rates (points/hour):
+    rows follow `your_rates`, columns `opponent_rates`. One vectorised solve for
+    the whole grid; end hours are inf where the war doesn't settle within `horizon`.
+    """
+    import numpy as np
+
+    lead_rate = np.asarray(your_rates, dtype=float)[:, None] - np.asarray(opponent_rates, dtype=float)[None, :]
+    end_hour = solve_war_end_at_rate(current_hour, current_lead, lead_rate, starting_goal, horizon)
+    with np.errstate(invalid="ignore"):
+        final_lead = np.where(np.isfinite(end_hour), current_lead + lead_rate * (end_hour - current_hour), np.nan)
+    return {"end_hour": end_hour, "final_lead": final_lead}
+
+def predict_war_ends(current_hour, current_lead, your_score, starting_goal):
+    """Vectorised predict_war_end: every input may be an array; returns a dict of arrays."""
+    import numpy as np
+
+    h0, lead, score, goal = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (current_hour, current_lead, your_score, starting_goal)))
+    end_hour = solve_war_end(h0, lead, goal)
+    hours_remaining = end_hour - h0
+
+    # Unsolvable scenarios (inf hours remaining) come out as inf/nan rather than warnings
+    with np.errstate(invalid="ignore"):
+        gap_rate = np.divide(np.abs(lead), h0, out=np.zeros_like(lead), where=h0 != 0)
+        final_lead = np.sign(lead) * (np.abs(lead) + gap_rate * hours_remaining)
+
+        opponent_score = score - lead
+        opponent_rate = np.divide(opponent_score, h0, out=np.zeros_like(lead), where=h0 != 0)
+        opponent_final = opponent_score + opponent_rate * hours_remaining
+
+    return {
+        "war_end_hour": end_hour,
+        "hours_remaining": hours_remaining,
+        "your_final_score": opponent_final + final_lead,
+        "opponent_final_score": opponent_final,
+        "final_lead": final_lead
+    }
+
+def _solve_war_end_scalar(current_hour: float, current_lead: float, starting_goal: float) -> float:
+    """solve_war_end for one scenario in plain floats; NumPy's per-call overhead dominates at size 1."""
+    h0, gap, goal = float(current_hour), abs(float(current_lead)), float(starting_goal)
+    rate = gap / h0 if h0 else 0.0
+
+    def shortfall(hour):
+        return goal * TARGET_DECAY ** max(0.0, hour - DECAY_START_HOUR) - (gap + rate * (hour - h0))
+
+    if shortfall(h0) <= 0:
+        return h0
+    if gap == 0:
+        return math.inf
+
+    lo = h0
+    hi = max(DECAY_START_HOUR + math.log(gap / goal) / math.log(TARGET_DECAY), h0)
+    # Only as many halvings as the bracket needs to get below the tolerance
+    for _ in range(max(1, math.ceil(math.log2(max(hi - lo, SOLVER_TOLERANCE) / SOLVER_TOLERANCE)))):
+        mid = (lo + hi) / 2
+        if shortfall(mid) <= 0:
+            hi = mid
+        else:
+            lo = mid
+    return math.ceil(hi * 60 - 1e-6) / 60
+
+def predict_war_end(current_hour, current_lead, your_score, starting_score_goal):
+    end_hour = _solve_war_end_scalar(current_hour, current_lead, starting_score_goal)
+    if end_hour == float("inf"):
         raise ValueError("❌ Could not estimate war end — progress too slow.")
 
-    end_hour = hours[end_index]
-    final_lead = lead_values[end_index]
+    # Same projection as predict_war_ends, in floats
     hours_remaining = end_hour - current_hour
-
-    opponent_gain_per_hour = (opponent_score + (lead_gain_per_hour * current_hour)) / current_hour - lead_gain_per_hour
-    estimated_opponent_final = opponent_score + opponent_gain_per_hour * hours_remaining
-    estimated_your_final = estimated_opponent_final + final_lead
+    gap_rate = abs(current_lead) / current_hour if current_hour else 0.0
+    final_lead = math.copysign(abs(current_lead) + gap_rate * hours_remaining, current_lead) if current_lead else 0.0
+    opponent_score = your_score - current_lead
+    opponent_rate = opponent_score / current_hour if current_hour else 0.0
+    opponent_final = opponent_score + opponent_rate * hours_remaining
 
     return {
-        "war_end_hour": round(end_hour, 1),
-        "hours_remaining": round(hours_remaining, 1),
-        "your_final_score": int(estimated_your_final),
-        "opponent_final_score": int(estimated_opponent_final),
+        "war_end_hour": round(end_hour, 2),
+        "hours_remaining": round(hours_remaining, 2),
+        "your_final_score": int(opponent_final + final_lead),
+        "opponent_final_score": int(opponent_final),
         "final_lead": int(final_lead)
     }
 
+def no_more_hits_end_hour(current_lead, starting_goal, current_hour):
+    """
+    Whole hour at which the hourly-decayed target first drops to |lead| if nobody
+    scores again, in closed form. Accepts NumPy arrays; inf for a zero lead.
+    """
+    import numpy as np
+
+    gap = np.abs(np.asarray(current_lead, dtype=float))
+    goal = np.asarray(starting_goal, dtype=float)
+    start = np.floor(np.asarray(current_hour, dtype=float))
+    with np.errstate(divide="ignore"):
+        # target(k) = goal * 0.99^(k - 24) <= gap  <=>  k >= 24 + log(gap / goal) / log(0.99)
+        decay_hours = np.ceil(np.log(gap / goal) / np.log(TARGET_DECAY) - 1e-9)
+    end = np.maximum(start, DECAY_START_HOUR + np.maximum(0, decay_hours))
+    end = np.where(gap >= goal, start, end)
+    return np.where(gap > 0, end, np.inf)
+
 def estimate_win_time_if_no_more_hits(current_lead: float, starting_goal: float, current_hour: float) -> str:
     """
     Estimate when the decaying target drops below the absolute value of the current lead,
     assuming no more hits are made.
     """
-    from math import floor
-
     if current_lead == 0:
         return "⚖️ The lead is currently zero — unclear when decay will settle the score."
 
-    abs_lead = abs(current_lead)
-    decay_hour = floor(current_hour)
-    target = starting_goal * (0.99 ** max(0, decay_hour - 24))
-    
-    while target > abs_lead:
-        decay_hour += 1
-        if decay_hour - current_hour > 1000:
-            return "❌ Unable to estimate (lead too low or error in logic)"
-        target *= 0.99
-
+    decay_hour = int(no_more_hits_end_hour(current_lead, starting_goal, current_hour))
     hours_until_end = decay_hour - current_hour
-    from datetime import timedelta
+    if hours_until_end > 1000:
+        return "❌ Unable to estimate (lead too low or error in logic)"
+
     eta = timedelta(hours=hours_until_end)
     return f"⏳ If no more hits are made, the war will end in {eta} (at hour {decay_hour})."
 
 # ---- Logging helper ----
-def log_war_data(data: dict, result: dict):
-    log_path = Path("data/current_war.json")
-    timestamp = int(datetime.utcnow().timestamp())
-
-    log_entry = {
-        "timestamp": timestamp,
-        "current_hour": data["current_hour"],
-        "your_score": data["your_score"],
-        "lead": data["current_lead"],
-        "target": data["starting_goal"],
-        "predicted_end": result["war_end_hour"]
-    }
-
-    if log_path.exists():
-        with open(log_path, "r", encoding="utf-8") as f:
-            existing = json.load(f)
-        if existing["war_id"] != data["war_id"]:
-            # New war, reset log
-            log_data = {
-                "war_id": data["war_id"],
-                "factions": data["factions"],
-                "start": data["start"],
-                "history": [log_entry]
-            }
-        else:
-            existing["history"].append(log_entry)
-            log_data = existing
-    else:
-        # New file
-        log_data = {
-            "war_id": data["war_id"],
-            "factions": data["factions"],
-            "start": data["start"],
-            "history": [log_entry]
-        }
+def load_war_log(war_id):
+    """The archived history for a war, or None if nothing has been recorded for it."""
+    from utils.war_archive import load_war
 
-    with open(log_path, "w", encoding="utf-8") as f:
-        json.dump(log_data, f, indent=4)
+    return load_war(war_id)
 
+def log_war_data(data: dict, result: dict):
+    """Append this prediction to the war archive; manual /warpredict inputs (war_id 0) aren't archived."""
+    from utils.war_archive import record_war_sample
 
+    if not data.get("war_id"):
+        return
+    record_war_sample(data, predicted_end=result["war_end_hour"])
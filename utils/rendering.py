@@ -0,0 +1,230 @@
+"""
+Chart rendering off the event loop.
+
+Charts are drawn in a small process pool with Matplotlib's object-oriented
+Figure API on the Agg canvas (no pyplot global state), so a slow render never
+blocks the gateway heartbeat or other commands. Render functions take plain
+data (numbers, lists, NumPy arrays) and return PNG bytes; `render()` bounds how
+many renders may be queued and how long each one may take. Finished PNGs are
+kept in a content-addressed cache, so asking again for a chart whose data
+hasn't changed returns the same image without rendering.
+"""
+import asyncio
+import functools
+import math
+import multiprocessing
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Optional
+
+from constants import RENDER_WORKERS, RENDER_QUEUE_LIMIT, RENDER_TIMEOUT, CHART_CACHE_BYTES
+from utils.cache import ChartCache, make_chart_key
+
+
+class RenderError(Exception):
+    pass
+
+
+class RenderBusy(RenderError):
+    def __init__(self):
+        super().__init__("Chart renderer is busy, try again in a moment.")
+
+
+class RenderTimeout(RenderError):
+    def __init__(self, timeout: float):
+        super().__init__(f"Chart took longer than {timeout:.0f}s to render.")
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pending = 0
+
+chart_cache = ChartCache(CHART_CACHE_BYTES)
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def _on_alarm(signum, frame):
+    raise TimeoutError("render timed out")
+
+
+def _run_with_deadline(fn, timeout: float, args: tuple, kwargs: dict) -> bytes:
+    """Runs in the worker; the alarm frees the worker even if the caller stopped waiting."""
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.alarm(max(1, math.ceil(timeout)))
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        signal.alarm(0)
+
+
+def _warm_up():
+    return None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Never fork the bot itself: by now it has threads (DNS resolver, executors) that
+        # a forked child could deadlock on. The fork server is a fresh single-threaded process.
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(["utils.rendering"])
+        else:
+            context = multiprocessing.get_context("spawn")
+        _pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=context, initializer=_init_worker)
+    return _pool
+
+
+def start_renderer():
+    """Start the worker processes now, so the first chart doesn't pay for their start-up."""
+    pool = _get_pool()
+    for _ in range(RENDER_WORKERS):
+        pool.submit(_warm_up)
+
+
+async def render(fn, *args, timeout: float = RENDER_TIMEOUT, **kwargs) -> bytes:
+    """
+    PNG bytes for a render function from this module, from the chart cache or
+    the worker pool. Raises RenderBusy when RENDER_QUEUE_LIMIT renders are
+    already queued, and RenderTimeout when the render overruns `timeout` seconds.
+    """
+    key = make_chart_key(fn, args, kwargs)
+    return await chart_cache.get_or_render(key, lambda: _render_in_pool(fn, timeout, args, kwargs))
+
+
+async def _render_in_pool(fn, timeout: float, args: tuple, kwargs: dict) -> bytes:
+    global _pending
+    if _pending >= RENDER_QUEUE_LIMIT:
+        raise RenderBusy()
+
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        job = functools.partial(_run_with_deadline, fn, timeout, args, kwargs)
+        # Time spent queued behind other renders counts towards the caller's wait, not the worker's alarm
+        return await asyncio.wait_for(loop.run_in_executor(_get_pool(), job), timeout * 2)
+    except (asyncio.TimeoutError, TimeoutError):
+        raise RenderTimeout(timeout)
+    finally:
+        _pending -= 1
+
+
+def shutdown_renderer():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# --- Render functions (run inside the worker processes) ---
+
+def _new_figure(ncols: int = 1, figsize=None):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots(1, ncols)
+
+
+def _to_png(fig) -> bytes:
+    buf = BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+def price_trend_png(title: str, timestamps, prices, low=None, high=None, label: Optional[str] = None,
+                    date_format: str = "%d %b %H:%M") -> bytes:
+    """Price line over epoch timestamps, with an optional shaded low-high band."""
+    import numpy as np
+    import matplotlib.dates as mdates
+
+    fig, ax = _new_figure()
+    times = np.asarray(timestamps, dtype="int64").astype("datetime64[s]")
+    if low is not None and high is not None:
+        ax.fill_between(times, low, high, alpha=0.3, step="post", label="Low–High")
+    ax.plot(times, prices, marker="o" if len(times) < 100 else None, label=label)
+    ax.set_title(title)
+    ax.set_xlabel("Time (UTC)")
+    ax.set_ylabel("Price (T$)")
+    ax.xaxis.set_major_formatter(mdates.DateFormatter(date_format))
+    ax.tick_params(axis="x", labelrotation=45)
+    ax.grid(True)
+    fig.tight_layout()
+    return _to_png(fig)
+
+
+def war_prediction_png(hours, lead_values, target_values, end_hour: float) -> bytes:
+    """Projected lead against the decaying target, with the predicted end marked."""
+    fig, ax = _new_figure()
+    ax.plot(hours, lead_values, label="Your Lead")
+    ax.plot(hours, target_values, label="Target", linestyle="--")
+    ax.axvline(end_hour, color="red", linestyle=":", label="Predicted End")
+    ax.set_title("Lead vs. Decaying Target")
+    ax.set_xlabel("War Hour")
+    ax.set_ylabel("Points")
+    ax.legend()
+    ax.grid(True)
+    return _to_png(fig)
+
+
+def war_fan_png(hours, bands, target_values, title: str = "Simulated Lead (Monte Carlo)") -> bytes:
+    """
+    Fan chart of simulated leads: `bands` has the 5/25/50/75/95th percentile
+    leads per hour as columns; the decaying target is drawn either side of zero.
+    """
+    import numpy as np
+
+    bands = np.asarray(bands)
+    fig, ax = _new_figure()
+    ax.fill_between(hours, bands[:, 0], bands[:, 4], alpha=0.2, color="tab:blue", label="5–95%")
+    ax.fill_between(hours, bands[:, 1], bands[:, 3], alpha=0.4, color="tab:blue", label="25–75%")
+    ax.plot(hours, bands[:, 2], color="tab:blue", label="Median lead")
+    ax.plot(hours, target_values, color="red", linestyle="--", label="Target")
+    ax.plot(hours, -np.asarray(target_values), color="red", linestyle="--")
+    ax.axhline(0, color="grey", linewidth=0.8)
+    ax.set_title(title)
+    ax.set_xlabel("War Hour")
+    ax.set_ylabel("Lead")
+    ax.legend(loc="upper left")
+    ax.grid(True)
+    return _to_png(fig)
+
+
+def war_whatif_png(your_rates, opponent_rates, end_hours, final_leads, current_rates=None, by_hour=None) -> bytes:
+    """
+    Heatmaps over (opponent rate, your rate): the hour the war ends and who wins.
+    `current_rates` (yours, theirs) is marked; `by_hour` draws its contour.
+    """
+    import numpy as np
+    from matplotlib.colors import ListedColormap
+
+    end_hours = np.where(np.isfinite(end_hours), end_hours, np.nan)
+    outcome = np.where(np.isnan(final_leads), 0, np.sign(final_leads))
+    extent = (opponent_rates[0], opponent_rates[-1], your_rates[0], your_rates[-1])
+
+    fig, (end_ax, outcome_ax) = _new_figure(ncols=2, figsize=(12, 5))
+    image = end_ax.imshow(end_hours, origin="lower", extent=extent, aspect="auto", cmap="viridis_r")
+    fig.colorbar(image, ax=end_ax, label="War end hour")
+    if by_hour is not None and np.nanmin(end_hours) <= by_hour <= np.nanmax(end_hours):
+        end_ax.contour(opponent_rates, your_rates, end_hours, levels=[by_hour], colors="white", linestyles="--")
+    end_ax.set_title("War End Hour" + (f" (dashed: hour {by_hour:g})" if by_hour is not None else ""))
+
+    outcome_ax.imshow(
+        outcome, origin="lower", extent=extent, aspect="auto",
+        cmap=ListedColormap(["tab:red", "lightgrey", "tab:green"]), vmin=-1, vmax=1
+    )
+    outcome_ax.set_title("Outcome (green: win, red: loss, grey: no end)")
+
+    for ax in (end_ax, outcome_ax):
+        if current_rates is not None:
+            ax.plot(current_rates[1], current_rates[0], marker="x", color="black", markersize=10, label="Current rates")
+            ax.legend(loc="upper right")
+        ax.set_xlabel("Opponent points/hour")
+        ax.set_ylabel("Your points/hour")
+    fig.tight_layout()
+    return _to_png(fig)
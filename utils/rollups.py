@@ -0,0 +1,171 @@
+"""
+Multi-resolution OHLC rollups for item and point prices.
+
+Every raw sample is folded into 5-minute, 1-hour and 1-day candles as it
+arrives (one upsert per resolution), so long-range history costs a handful of
+rows per day instead of every sample. Raw samples stay in the hot stores
+(utils.item_price_store for 7 days, utils.point_log for 24 hours); each
+resolution has its own retention, and queries pick the resolution that covers
+the requested window in a sensible number of points.
+"""
+import time
+from typing import Optional
+
+from utils.storage import get_connection, transaction
+
+POINTS_SERIES = "points"
+
+# resolution (seconds) -> retention (seconds, None = keep forever)
+CANDLE_RETENTION = {
+    300: 30 * 86400,
+    3600: 365 * 86400,
+    86400: None,
+}
+
+# Raw point samples (one a minute, kept 24h) serve short point windows. Items are
+# folded into candles on every market sweep but only written raw every 30 minutes,
+# so item queries always read candles.
+RAW_POINT_RETENTION = 86400
+RAW_POINT_INTERVAL = 60
+
+# Charts and stats don't need more points than this
+MAX_SERIES_POINTS = 500
+
+UPSERT = (
+    "INSERT INTO price_candles (series, resolution, bucket, open, high, low, close, total, count) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1) "
+    "ON CONFLICT(series, resolution, bucket) DO UPDATE SET "
+    "high = MAX(high, excluded.high), low = MIN(low, excluded.low), "
+    "close = excluded.close, total = total + excluded.total, count = count + 1"
+)
+
+
+def item_series(item_key: str) -> str:
+    return f"item:{item_key}"
+
+
+def fold_many(samples_by_series: dict):
+    """Fold {series: [(timestamp, price), ...]} (oldest first) into every candle resolution."""
+    rows = [
+        (series, resolution, ts - ts % resolution, price, price, price, price, price)
+        for series, samples in samples_by_series.items()
+        for ts, price in samples
+        for resolution in CANDLE_RETENTION
+    ]
+    if not rows:
+        return
+    with transaction() as conn:
+        conn.executemany(UPSERT, rows)
+
+
+def fold_samples(series: str, samples):
+    fold_many({series: samples})
+
+
+def fold_sample(series: str, price: int, timestamp: Optional[int] = None):
+    fold_samples(series, [(timestamp or int(time.time()), int(price))])
+
+
+def trim_candles(now: Optional[int] = None):
+    """Apply each resolution's retention policy."""
+    now = now or int(time.time())
+    with transaction() as conn:
+        for resolution, retention in CANDLE_RETENTION.items():
+            if retention is not None:
+                conn.execute(
+                    "DELETE FROM price_candles WHERE resolution = ? AND bucket < ?",
+                    (resolution, now - retention)
+                )
+
+
+def initialise_rollups():
+    """Build candles from the raw stores the first time rollups run."""
+    if get_connection().execute("SELECT 1 FROM price_candles LIMIT 1").fetchone():
+        return
+
+    from utils import item_price_store, point_log
+
+    samples = {POINTS_SERIES: point_log.read_since(0)}
+    for item_key in item_price_store.list_items():
+        timestamps, prices = item_price_store.read(item_key)
+        samples[item_series(item_key)] = list(zip(timestamps.tolist(), prices.tolist()))
+    fold_many(samples)
+    print("✅ Built price rollups from existing history.")
+
+
+def choose_resolution(series: str, window: int, max_points: int = MAX_SERIES_POINTS) -> int:
+    """
+    0 for raw samples, otherwise a candle resolution: the finest one that both
+    still holds the whole window and needs no more than `max_points` buckets,
+    falling back to the coarsest resolution.
+    """
+    if series == POINTS_SERIES and window <= RAW_POINT_RETENTION and window // RAW_POINT_INTERVAL <= max_points:
+        return 0
+    for resolution, retention in sorted(CANDLE_RETENTION.items()):
+        covers = retention is None or window <= retention
+        if covers and window // resolution <= max_points:
+            return resolution
+    return max(CANDLE_RETENTION)
+
+
+def _raw_point_series(since: int, until: int) -> dict:
+    import numpy as np
+    from utils import point_log
+
+    samples = [(ts, price) for ts, price in point_log.read_since(since) if ts < until]
+    timestamps = np.array([ts for ts, _ in samples], dtype=np.int64)
+    prices = np.array([price for _, price in samples], dtype=np.int64)
+
+    return {
+        "timestamp": timestamps, "open": prices, "high": prices, "low": prices,
+        "close": prices, "total": prices, "count": np.ones_like(prices)
+    }
+
+
+def get_series(series: str, window: int, now: Optional[int] = None, max_points: int = MAX_SERIES_POINTS,
+               closed_before: Optional[int] = None) -> dict:
+    """
+    Price series for the last `window` seconds at an automatically chosen
+    resolution. Returns NumPy arrays keyed timestamp/open/high/low/close/total/count
+    plus "resolution" (0 = raw samples). With `closed_before`, the window ends
+    there and only candles that had closed by then are returned, so the result
+    doesn't change while the newest bucket is still being updated.
+    """
+    import numpy as np
+
+    until = closed_before or now or int(time.time())
+    since = until - window
+    resolution = choose_resolution(series, window, max_points)
+
+    if resolution == 0:
+        result = _raw_point_series(since, until)
+    else:
+        last_bucket = until - resolution if closed_before else until
+        rows = get_connection().execute(
+            "SELECT bucket, open, high, low, close, total, count FROM price_candles "
+            "WHERE series = ? AND resolution = ? AND bucket >= ? AND bucket <= ? ORDER BY bucket",
+            (series, resolution, since - since % resolution, last_bucket)
+        ).fetchall()
+        columns = np.array(rows, dtype=np.int64).reshape(-1, 7)
+        result = {
+            name: columns[:, i]
+            for i, name in enumerate(("timestamp", "open", "high", "low", "close", "total", "count"))
+        }
+
+    result["resolution"] = resolution
+    return result
+
+
+def series_stats(data: dict) -> Optional[dict]:
+    """Low/high/mean/last over a series returned by get_series."""
+    if data["count"].size == 0:
+        return None
+    samples = int(data["count"].sum())
+    return {
+        "count": samples,
+        "min": int(data["low"].min()),
+        "max": int(data["high"].max()),
+        "mean": float(data["total"].sum() / samples),
+        "last": int(data["close"][-1]),
+        "resolution": data["resolution"]
+    }
@@ -1,42 +1,40 @@
-import aiohttp
 import asyncio
-import discord
 from datetime import datetime
-import os
-import json
 from discord.ext import tasks
 
-TORN_API_KEY = os.getenv("TORN_API_KEY")
-ALERT_FILE_PATH = "/mnt/data/shoplifting_last_alerted.json"
+from utils.torn_api import fetch_shoplifting
+from utils.storage import get_connection, transaction
+from utils.outbox import outbox
+
+SHOPLIFTING_CHANNEL = "shoplifting-alert"
+SHOPLIFTING_TITLE = "🛒 Shoplifting"
+
+ALERT_FILE_PATH = "/mnt/data/shoplifting_last_alerted.json"  # legacy, imported once by utils.json_migration
 
 last_alerted = set()
 last_alert_time = None
 first_run = True
 
-# Create or load alert state
+# Load alert state
+def get_alerted_shops() -> set:
+    rows = get_connection().execute("SELECT shop FROM shoplifting_alerted").fetchall()
+    return {row["shop"] for row in rows}
+
 def load_alerted_shops():
     global last_alerted
-    if os.path.exists(ALERT_FILE_PATH):
-        with open(ALERT_FILE_PATH, "r") as f:
-            try:
-                last_alerted = set(json.load(f))
-            except Exception as e:
-                print(f"⚠️ Failed to load alert file: {e}")
-                last_alerted = set()
-    else:
-        # Create file if missing
-        with open(ALERT_FILE_PATH, "w") as f:
-            json.dump([], f)
+    last_alerted = get_alerted_shops()
 
 def save_alerted_shops():
-    with open(ALERT_FILE_PATH, "w") as f:
-        json.dump(list(last_alerted), f)
+    """Write only the difference between memory and the stored set."""
+    stored = get_alerted_shops()
+    with transaction() as conn:
+        conn.executemany("INSERT OR IGNORE INTO shoplifting_alerted (shop) VALUES (?)",
+                         [(shop,) for shop in last_alerted - stored])
+        conn.executemany("DELETE FROM shoplifting_alerted WHERE shop = ?",
+                         [(shop,) for shop in stored - last_alerted])
 
 async def fetch_shoplifting_data():
-    url = f"https://api.torn.com/torn/?selections=shoplifting&key={TORN_API_KEY}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as resp:
-            return await resp.json()
+    return {"shoplifting": await fetch_shoplifting()}
 
 def get_vulnerable_shops(shop_data: dict):
     vulnerable = []
@@ -51,10 +49,9 @@ async def monitor_shoplifting(bot):
     await bot.wait_until_ready()
     load_alerted_shops()
 
-    channel = discord.utils.get(bot.get_all_channels(), name="shoplifting-alert")
-
-    if first_run and channel:
-        await channel.send("🟢 Shoplifting monitor is now online and checking every minute.")
+    if first_run:
+        outbox.post(SHOPLIFTING_CHANNEL, "🟢 Shoplifting monitor is now online and checking every minute.",
+                    title=SHOPLIFTING_TITLE)
         first_run = False
 
     try:
@@ -70,9 +67,10 @@ async def monitor_shoplifting(bot):
                 last_alerted.add(shop)
                 alert_sent = True
                 last_alert_time = now
-                if channel:
-                    name = shop.replace("_", " ").title()
-                    await channel.send(f"🛒 **{name}** is fully vulnerable — all security disabled!")
+                name = shop.replace("_", " ").title()
+                # All newly vulnerable shops from this check go out as one embed
+                outbox.post(SHOPLIFTING_CHANNEL, f"🛒 **{name}** is fully vulnerable — all security disabled!",
+                            title=SHOPLIFTING_TITLE, dedupe_key=f"shop:{shop}")
 
         # Clean up alert cache
         last_alerted.intersection_update(vulnerable)
@@ -81,8 +79,8 @@ async def monitor_shoplifting(bot):
         # Hourly heartbeat
         if now.minute == 0:
             if not last_alert_time or (now - last_alert_time).seconds > 3600:
-                if channel:
-                    await channel.send("🕐 Hourly check complete — no fully vulnerable shops found in the last hour.")
+                outbox.post(SHOPLIFTING_CHANNEL, "🕐 Hourly check complete — no fully vulnerable shops found in the last hour.",
+                            title=SHOPLIFTING_TITLE)
 
     except Exception as e:
         print(f"[Shoplifting Monitor] Error: {e}")
\ No newline at end of file
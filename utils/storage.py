@@ -0,0 +1,153 @@
+import json
+import sqlite3
+import threading
+
+from constants import DATABASE_FILE
+
+# One table (or a few) per domain. Every statement is idempotent so the schema is
+# applied on each new connection.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS bank_balances (
+    user_id INTEGER PRIMARY KEY,
+    balance INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS bank_ledger (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    balance_after INTEGER NOT NULL,
+    actor_id INTEGER,
+    created_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_bank_ledger_user ON bank_ledger (user_id, id);
+
+CREATE TABLE IF NOT EXISTS bank_snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ledger_id INTEGER NOT NULL,
+    created_at INTEGER NOT NULL,
+    balances TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS tracked_items (
+    item_key TEXT PRIMARY KEY,
+    item_id INTEGER NOT NULL,
+    buy INTEGER,
+    sell INTEGER,
+    position INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS insurance_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sender_id INTEGER,
+    timestamp INTEGER NOT NULL,
+    coverage_end INTEGER NOT NULL,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_insurance_log_ts ON insurance_log (timestamp);
+CREATE INDEX IF NOT EXISTS idx_insurance_log_end ON insurance_log (coverage_end);
+
+CREATE TABLE IF NOT EXISTS train_tracker (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    trains_bought INTEGER NOT NULL DEFAULT 0,
+    trains_received INTEGER NOT NULL DEFAULT 0,
+    cost_per_train INTEGER NOT NULL DEFAULT 0,
+    latest_log_timestamp INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO train_tracker (id) VALUES (1);
+
+CREATE TABLE IF NOT EXISTS shoplifting_alerted (
+    shop TEXT PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS wars (
+    war_id INTEGER PRIMARY KEY,
+    your_faction TEXT,
+    enemy_faction TEXT,
+    start INTEGER,
+    starting_goal INTEGER,
+    first_timestamp INTEGER NOT NULL,
+    last_timestamp INTEGER NOT NULL,
+    last_hour REAL NOT NULL,
+    samples INTEGER NOT NULL DEFAULT 0,
+    your_score INTEGER NOT NULL,
+    lead INTEGER NOT NULL,
+    max_lead INTEGER NOT NULL,
+    min_lead INTEGER NOT NULL,
+    predicted_end REAL
+);
+
+CREATE TABLE IF NOT EXISTS war_samples (
+    war_id INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    current_hour REAL NOT NULL,
+    your_score INTEGER NOT NULL,
+    lead INTEGER NOT NULL,
+    starting_goal INTEGER,
+    predicted_end REAL
+);
+CREATE INDEX IF NOT EXISTS idx_war_samples_war ON war_samples (war_id, current_hour);
+
+CREATE TABLE IF NOT EXISTS price_candles (
+    series TEXT NOT NULL,
+    resolution INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    open INTEGER NOT NULL,
+    high INTEGER NOT NULL,
+    low INTEGER NOT NULL,
+    close INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (series, resolution, bucket)
+) WITHOUT ROWID;
+"""
+
+_local = threading.local()
+
+
+def get_connection() -> sqlite3.Connection:
+    """Per-thread connection to the bot database, in WAL mode with the schema applied."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DATABASE_FILE, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.executescript(SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def transaction() -> sqlite3.Connection:
+    """Use as `with transaction() as conn:` — commits on success, rolls back on error."""
+    return get_connection()
+
+
+def get_setting(key: str, default=None):
+    row = get_connection().execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+    return json.loads(row["value"]) if row else default
+
+
+def set_setting(key: str, value):
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO settings (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value))
+        )
+
+
+def initialise_database():
+    """Open the database (creating tables) and import any legacy JSON files once."""
+    from utils.json_migration import migrate_json_files
+
+    get_connection()
+    migrate_json_files()
+    print(f"✅ Database ready at {DATABASE_FILE}")
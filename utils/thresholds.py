@@ -1,22 +1,25 @@
 
-import os
 import discord
-import json
-from constants import THRESHOLDS_FILE
 from utils.tracked_items import load_combined_items_data
 from utils.normalise import normalise_item_name
+from utils.storage import get_setting, set_setting
 
-# 🔄 Load just point thresholds (points.json stays separate)
+# 🔄 Load just point thresholds (item thresholds live with the tracked items)
 def load_thresholds():
-    try:
-        with open(THRESHOLDS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"buy": None, "sell": None}
+    return get_setting("point_thresholds", {"buy": None, "sell": None})
 
 def save_thresholds(thresholds):
-    with open(THRESHOLDS_FILE, "w", encoding="utf-8") as f:
-        json.dump(thresholds, f, indent=4)
+    set_setting("point_thresholds", thresholds)
+
+def set_points_buy_threshold(threshold):
+    thresholds = load_thresholds()
+    thresholds["buy"] = threshold
+    save_thresholds(thresholds)
+
+def set_points_sell_threshold(threshold):
+    thresholds = load_thresholds()
+    thresholds["sell"] = threshold
+    save_thresholds(thresholds)
 
 # ✅ Post summary of all thresholds (points + items)
 async def post_threshold_summary(bot):
@@ -0,0 +1,183 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Optional
+
+import aiohttp
+
+from constants import ITEM_FETCH_CONCURRENCY, ITEM_FETCH_TIMEOUT
+from utils.key_pool import key_pool
+from utils.cache import api_cache, make_cache_key
+
+# Torn error code for "Too many requests"
+RATE_LIMIT_ERROR_CODE = 5
+
+TORN_API_BASE = "https://api.torn.com"
+
+# One keep-alive connection pool shared by every poller and command.
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=5)
+MAX_CONNECTIONS = 20
+KEEPALIVE_SECONDS = 60
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+class TornAPIError(Exception):
+    """Raised when Torn answers with an error payload or a non-200 status."""
+
+    def __init__(self, code, message):
+        super().__init__(f"Torn API error {code}: {message}")
+        self.code = code
+        self.message = message
+
+
+@dataclass(frozen=True)
+class ItemListing:
+    price: int
+    amount: int
+
+
+@dataclass(frozen=True)
+class PointsOffer:
+    cost: int
+    quantity: int
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the shared session, creating it on first use inside the running loop."""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=MAX_CONNECTIONS,
+            keepalive_timeout=KEEPALIVE_SECONDS,
+            ttl_dns_cache=300
+        )
+        _session = aiohttp.ClientSession(connector=connector, timeout=REQUEST_TIMEOUT)
+    return _session
+
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def torn_get(path: str, params: Optional[dict] = None, purpose: str = "default",
+                   api_key: Optional[str] = None, reserve: int = 0) -> dict:
+    """
+    GET a Torn API path (e.g. "v2/market/206/itemmarket") and return the decoded JSON.
+    The key comes from the key pool for `purpose` (see constants.API_KEYS) unless one
+    is given; background callers pass `reserve` to leave headroom on the key.
+    """
+    key = api_key or await key_pool.acquire(purpose, reserve)
+
+    query = dict(params or {})
+    query["key"] = key
+    url = f"{TORN_API_BASE}/{path.lstrip('/')}"
+
+    async with get_session().get(url, params=query) as response:
+        if response.status != 200:
+            raise TornAPIError(response.status, f"HTTP {response.status}")
+        data = await response.json(content_type=None)
+
+    if isinstance(data, dict) and "error" in data:
+        error = data["error"]
+        if error.get("code") == RATE_LIMIT_ERROR_CODE:
+            key_pool.mark_exhausted(key)
+        raise TornAPIError(error.get("code"), error.get("error"))
+    return data
+
+
+async def torn_get_cached(path: str, params: Optional[dict] = None, purpose: str = "default",
+                          max_age: Optional[float] = None) -> dict:
+    """
+    torn_get through the shared TTL cache. Returns a response no older than `max_age`
+    seconds; identical concurrent calls share a single request.
+    """
+    key = make_cache_key(path, params)
+    return await api_cache.get_or_fetch(key, lambda: torn_get(path, params, purpose), max_age)
+
+
+async def _get(path: str, params: Optional[dict], purpose: str, max_age: Optional[float]) -> dict:
+    """Uncached unless the caller says how stale a response it will accept."""
+    if max_age is None:
+        return await torn_get(path, params, purpose)
+    return await torn_get_cached(path, params, purpose, max_age)
+
+
+# ---- Typed response parsing ----
+def parse_item_listings(data: dict) -> list:
+    """Turn a v2 itemmarket payload into a list of ItemListing."""
+    listings = (data.get("itemmarket") or {}).get("listings") or []
+    return [ItemListing(price=int(l["price"]), amount=int(l.get("amount", 1))) for l in listings]
+
+
+def parse_points_market(data: dict) -> list:
+    """Turn a pointsmarket payload into a list of PointsOffer."""
+    offers = data.get("pointsmarket") or {}
+    return [PointsOffer(cost=int(o["cost"]), quantity=int(o.get("quantity", 0))) for o in offers.values()]
+
+
+# ---- Endpoint helpers ----
+async def fetch_lowest_item_listing(item_id, max_age: Optional[float] = None) -> Optional[ItemListing]:
+    """Cheapest item market listing for an item, or None if nothing is listed."""
+    data = await _get(f"v2/market/{item_id}/itemmarket", None, "items", max_age)
+    listings = parse_item_listings(data)
+    if not listings:
+        return None
+    return min(listings, key=lambda l: l.price)
+
+
+async def fetch_lowest_item_listings(item_ids: dict, concurrency: int = ITEM_FETCH_CONCURRENCY,
+                                     timeout: float = ITEM_FETCH_TIMEOUT):
+    """
+    Fetch the cheapest listing for many items at once.
+    `item_ids` maps a caller key to a Torn item ID. Yields (key, listing, error) tuples
+    in completion order, so callers can act on each result as soon as it arrives.
+    At most `concurrency` requests are in flight and each one is cut off after `timeout` seconds.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch_one(key, item_id):
+        async with semaphore:
+            try:
+                listing = await asyncio.wait_for(fetch_lowest_item_listing(item_id), timeout)
+                return key, listing, None
+            except asyncio.TimeoutError:
+                return key, None, TimeoutError(f"timed out after {timeout}s")
+            except Exception as e:
+                return key, None, e
+
+    tasks = [asyncio.create_task(fetch_one(key, item_id)) for key, item_id in item_ids.items()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def fetch_lowest_points_offer(max_age: Optional[float] = None) -> PointsOffer:
+    data = await _get("market/", {"selections": "pointsmarket"}, "points", max_age)
+    offers = parse_points_market(data)
+    if not offers:
+        raise ValueError("No pointsmarket data found")
+    return min(offers, key=lambda o: o.cost)
+
+
+async def fetch_user_log(params: Optional[dict] = None, reserve: int = 0) -> dict:
+    """Return the `log` mapping (log_id -> entry) from user/?selections=log."""
+    query = {"selections": "log"}
+    query.update(params or {})
+    data = await torn_get("user/", query, purpose="logs", reserve=reserve)
+    return data.get("log") or {}
+
+
+async def fetch_faction_wars(max_age: Optional[float] = None) -> dict:
+    data = await _get("v2/faction/", {"selections": "wars"}, "war", max_age)
+    return data.get("wars") or {}
+
+
+async def fetch_shoplifting() -> dict:
+    data = await torn_get("torn/", {"selections": "shoplifting"})
+    return data.get("shoplifting") or {}
@@ -1,49 +1,98 @@
-import os
 import json
-import shutil
+from types import MappingProxyType
 from typing import Optional
 from constants import DEFAULT_COMBINED_ITEMS_FILE, MOUNTED_COMBINED_ITEMS_FILE
+from utils.storage import get_connection, transaction
 
 
 # Constants
-COMBINED_TRACKED_ITEMS_FILE = MOUNTED_COMBINED_ITEMS_FILE
+COMBINED_TRACKED_ITEMS_FILE = MOUNTED_COMBINED_ITEMS_FILE  # legacy, imported once by utils.json_migration
 MAX_TRACKED_ITEMS = 20
 
 def normalise_item_name(name: str) -> str:
-    """Resolve item name or ID to its internal key (case-insensitive)."""
-    tracked = list_tracked_items()
-    for display_name, item_id in tracked.items():
-        if name.lower().strip() == display_name.lower() or name.lower().strip() == str(item_id):
-            return display_name
-    return name.strip()
+    """Resolve item name or ID to its internal key (see utils.normalise)."""
+    from utils.normalise import normalise_item_name as resolve
+    return resolve(name)
 
 def initialise_combined_tracked_file():
-    """Ensure the combined tracked items file exists on the mounted volume."""
-    if not os.path.exists(COMBINED_TRACKED_ITEMS_FILE):
-        print("🆕 Mounted combined_tracked_items.json not found. Creating from default...")
-        try:
-            shutil.copyfile(DEFAULT_COMBINED_ITEMS_FILE, COMBINED_TRACKED_ITEMS_FILE)
-            print("✅ Created combined_tracked_items.json on mounted drive from default.")
-        except Exception as e:
-            print(f"❌ Failed to copy default file to mounted location: {e}")
-    else:
-        print("✅ Mounted combined_tracked_items.json already exists.")
+    """Seed the tracked items table from the bundled defaults if nothing is tracked yet."""
+    count = get_connection().execute("SELECT COUNT(*) FROM tracked_items").fetchone()[0]
+    if count:
+        print("✅ Tracked items already configured.")
+        return
+
+    print("🆕 No tracked items found. Seeding from default...")
+    try:
+        with open(DEFAULT_COMBINED_ITEMS_FILE, "r", encoding="utf-8") as f:
+            save_combined_items_data(json.load(f))
+        print("✅ Seeded tracked items from default.")
+    except Exception as e:
+        print(f"❌ Failed to seed tracked items from default: {e}")
+
+
+class TrackedItemsConfig:
+    """
+    In-memory copy of the tracked items table.
+
+    Reloads only when the table may have changed: after a write made through this
+    module, or when SQLite's data_version shows another connection committed.
+    Callers get a read-only view, so nobody can mutate the shared copy by accident.
+    """
+
+    def __init__(self):
+        self._view = None
+        self._data_version = None
+        self.reloads = 0
+
+    def _current_data_version(self) -> int:
+        return get_connection().execute("PRAGMA data_version").fetchone()[0]
+
+    def _read(self) -> dict:
+        rows = get_connection().execute(
+            "SELECT item_key, item_id, buy, sell FROM tracked_items ORDER BY position, rowid"
+        ).fetchall()
+        data = {}
+        for row in rows:
+            info = {"item_id": row["item_id"]}
+            if row["buy"] is not None:
+                info["buy"] = row["buy"]
+            if row["sell"] is not None:
+                info["sell"] = row["sell"]
+            data[row["item_key"]] = MappingProxyType(info)
+        return data
+
+    def get(self) -> MappingProxyType:
+        data_version = self._current_data_version()
+        if self._view is None or data_version != self._data_version:
+            self._view = MappingProxyType(self._read())
+            self._data_version = data_version
+            self.reloads += 1
+        return self._view
+
+    def invalidate(self):
+        self._view = None
+
+
+tracked_items_config = TrackedItemsConfig()
 
 
 def load_combined_items_data():
-    """Load data from the combined tracked items file."""
-    try:
-        with open(COMBINED_TRACKED_ITEMS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print("⚠️ combined_tracked_items.json not found.")
-        return {}
+    """All tracked items as a read-only {item_key: {"item_id", "buy", "sell"}} view, in insertion order."""
+    return tracked_items_config.get()
 
 
 def save_combined_items_data(data: dict):
-    """Save updated data to the combined tracked items file."""
-    with open(COMBINED_TRACKED_ITEMS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    """Replace every tracked item with the contents of `data` in one transaction."""
+    tracked_items_config.invalidate()
+    with transaction() as conn:
+        conn.execute("DELETE FROM tracked_items")
+        conn.executemany(
+            "INSERT INTO tracked_items (item_key, item_id, buy, sell, position) VALUES (?, ?, ?, ?, ?)",
+            [
+                (key, int(info["item_id"]), info.get("buy"), info.get("sell"), position)
+                for position, (key, info) in enumerate(data.items())
+            ]
+        )
 
 
 def add_tracked_item(name: str, item_id: int, buy: Optional[int] = None, sell: Optional[int] = None):
@@ -56,13 +105,13 @@ def add_tracked_item(name: str, item_id: int, buy: Optional[int] = None, sell: O
     if len(data) >= MAX_TRACKED_ITEMS:
         return False, "Cannot add more than 20 tracked items."
 
-    data[normalised] = {"item_id": item_id}
-    if buy is not None:
-        data[normalised]["buy"] = buy
-    if sell is not None:
-        data[normalised]["sell"] = sell
-
-    save_combined_items_data(data)
+    tracked_items_config.invalidate()
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO tracked_items (item_key, item_id, buy, sell, position) "
+            "VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM tracked_items))",
+            (normalised, int(item_id), buy, sell)
+        )
     return True, f"{name} (ID: {item_id}) added to tracking list."
 
 
@@ -74,8 +123,9 @@ def remove_tracked_item(name: str):
     if normalised not in data:
         return False, "Item not found in tracked list."
 
-    del data[normalised]
-    save_combined_items_data(data)
+    tracked_items_config.invalidate()
+    with transaction() as conn:
+        conn.execute("DELETE FROM tracked_items WHERE item_key = ?", (normalised,))
     return True, f"{name} removed from tracking list."
 
 
@@ -87,21 +137,18 @@ def update_item_threshold(item_name: str, buy: Optional[int] = None, sell: Optio
     if normalised not in data:
         raise ValueError(f"Item '{item_name}' not found in combined items.")
 
-    if buy is not None:
-        data[normalised]["buy"] = buy
-    if sell is not None:
-        data[normalised]["sell"] = sell
-
-    save_combined_items_data(data)
+    tracked_items_config.invalidate()
+    with transaction() as conn:
+        if buy is not None:
+            conn.execute("UPDATE tracked_items SET buy = ? WHERE item_key = ?", (buy, normalised))
+        if sell is not None:
+            conn.execute("UPDATE tracked_items SET sell = ? WHERE item_key = ?", (sell, normalised))
 
 
 def get_pretty_name_by_id(item_id: int) -> str:
     """Get the display name of an item based on its Torn item ID."""
-    data = load_combined_items_data()
-    for pretty_name, info in data.items():
-        if str(info.get("item_id")) == str(item_id):
-            return pretty_name
-    return str(item_id)
+    from utils.normalise import item_resolver
+    return item_resolver.key_for_id(item_id) or str(item_id)
 
 
 def list_tracked_items() -> dict:
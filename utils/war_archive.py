@@ -0,0 +1,106 @@
+"""
+Archive of every war the bot has seen, partitioned by war_id.
+
+Each prediction or score sample is one appended row in war_samples, and the
+per-war summary row in `wars` is updated in the same transaction, so listing or
+comparing wars never reads their samples. A single war's history is loaded
+only when a predictor (or the backtest) asks for it.
+"""
+import time
+from typing import Optional
+
+from utils.storage import get_connection, transaction
+
+# The single-war log this archive replaces; imported once by utils.json_migration
+LEGACY_WAR_LOG_FILE = "data/current_war.json"
+
+SUMMARY_COLUMNS = (
+    "war_id, your_faction, enemy_faction, start, starting_goal, first_timestamp, last_timestamp, "
+    "last_hour, samples, your_score, lead, max_lead, min_lead, predicted_end"
+)
+
+
+def insert_war_sample(conn, data: dict, predicted_end: Optional[float], timestamp: int):
+    """Sample row + summary upsert on an open connection; the caller owns the transaction."""
+    factions = data.get("factions") or [None, None]
+    starting_goal = data.get("starting_goal")
+
+    conn.execute(
+        "INSERT INTO war_samples (war_id, timestamp, current_hour, your_score, lead, starting_goal, predicted_end) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (data["war_id"], timestamp, data["current_hour"], data["your_score"], data["current_lead"], starting_goal, predicted_end)
+    )
+    conn.execute(
+        f"INSERT INTO wars ({SUMMARY_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(war_id) DO UPDATE SET "
+        "last_timestamp = excluded.last_timestamp, last_hour = excluded.last_hour, samples = samples + 1, "
+        "your_score = excluded.your_score, lead = excluded.lead, "
+        "max_lead = MAX(max_lead, excluded.lead), min_lead = MIN(min_lead, excluded.lead), "
+        "starting_goal = COALESCE(excluded.starting_goal, starting_goal), "
+        "predicted_end = COALESCE(excluded.predicted_end, predicted_end)",
+        (
+            data["war_id"], factions[0], factions[1], data.get("start"), starting_goal,
+            timestamp, timestamp, data["current_hour"], data["your_score"], data["current_lead"],
+            data["current_lead"], data["current_lead"], predicted_end
+        )
+    )
+
+
+def record_war_sample(data: dict, predicted_end: Optional[float] = None, timestamp: Optional[int] = None):
+    """Append one sample for `data["war_id"]` (a fetch_v2_war_data-style dict) and fold it into the summary."""
+    with transaction() as conn:
+        insert_war_sample(conn, data, predicted_end, timestamp or int(time.time()))
+
+
+def list_wars(limit: int = 10) -> list:
+    """Most recent wars first, summaries only."""
+    rows = get_connection().execute(
+        f"SELECT {SUMMARY_COLUMNS} FROM wars ORDER BY last_timestamp DESC LIMIT ?", (limit,)
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_war(war_id: int) -> Optional[dict]:
+    row = get_connection().execute(f"SELECT {SUMMARY_COLUMNS} FROM wars WHERE war_id = ?", (war_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def load_war_history(war_id: int, until_hour: Optional[float] = None) -> list:
+    """
+    One war's samples in hour order, as predictor/backtest entries. "target" is
+    the starting goal, as in the old current_war.json log.
+    """
+    query = (
+        "SELECT timestamp, current_hour, your_score, lead, starting_goal, predicted_end FROM war_samples "
+        "WHERE war_id = ?"
+    )
+    params = [war_id]
+    if until_hour is not None:
+        query += " AND current_hour <= ?"
+        params.append(until_hour)
+    rows = get_connection().execute(query + " ORDER BY current_hour", params).fetchall()
+    return [
+        {
+            "timestamp": row["timestamp"],
+            "current_hour": row["current_hour"],
+            "your_score": row["your_score"],
+            "lead": row["lead"],
+            "target": row["starting_goal"],
+            "predicted_end": row["predicted_end"]
+        }
+        for row in rows
+    ]
+
+
+def load_war(war_id: int) -> Optional[dict]:
+    """Summary plus history, in the same shape as the old current_war.json log."""
+    summary = get_war(war_id)
+    if summary is None:
+        return None
+    return {
+        "war_id": war_id,
+        "factions": [summary["your_faction"], summary["enemy_faction"]],
+        "start": summary["start"],
+        "summary": summary,
+        "history": load_war_history(war_id)
+    }
@@ -0,0 +1,146 @@
+"""
+Monte Carlo war outcome simulation.
+
+Each faction's hourly scoring rate is estimated (mean and spread) from the
+logged war history. Tens of thousands of paths are then stepped forward an hour
+at a time in batched NumPy: every path draws a fresh rate per faction per hour,
+and a path ends when the lead reaches the decaying target. The result is a win
+probability, end-time percentiles and lead percentile bands for a fan chart.
+CPU-bound; callers run `simulate_war` in an executor.
+"""
+import math
+import time
+from typing import Optional
+
+from constants import WAR_SIM_PATHS, WAR_SIM_BUDGET
+from utils.predictor import decayed_target
+
+# Used when the log has too few samples to measure spread: sd = 50% of the mean rate
+DEFAULT_RATE_CV = 0.5
+MIN_INTERVAL_HOURS = 0.25
+MAX_SIM_HOURS = 1000
+FAN_PATHS = 2000
+FAN_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def estimate_scoring_rates(history: Optional[list], current_hour: float, your_score: float, opponent_score: float) -> dict:
+    """
+    Per-hour scoring rate mean and standard deviation for both factions.
+    Rates over each logged interval are weighted by its length; the spread is
+    scaled to one hour (var_hour = sum(dt * (rate - mean)^2) / n).
+    """
+    samples = sorted(history or [], key=lambda e: e["current_hour"])
+    intervals = []
+    prev = samples[0] if samples else None
+    for cur in samples[1:]:
+        # Closely spaced samples (the live tracker logs every minute) are merged into longer intervals
+        dt = cur["current_hour"] - prev["current_hour"]
+        if dt < MIN_INTERVAL_HOURS:
+            continue
+        prev_opponent = prev["your_score"] - prev["lead"]
+        cur_opponent = cur["your_score"] - cur["lead"]
+        intervals.append((dt, (cur["your_score"] - prev["your_score"]) / dt, (cur_opponent - prev_opponent) / dt))
+        prev = cur
+
+    if len(intervals) >= 2:
+        total = sum(dt for dt, _, _ in intervals)
+        rates = {}
+        for i, side in ((1, "your"), (2, "opponent")):
+            mean = sum(interval[0] * interval[i] for interval in intervals) / total
+            var = sum(interval[0] * (interval[i] - mean) ** 2 for interval in intervals) / len(intervals)
+            rates[side] = (mean, var ** 0.5)
+        source = f"{len(intervals)} logged intervals"
+    else:
+        hours = max(current_hour, 1)
+        rates = {
+            "your": (your_score / hours, your_score / hours * DEFAULT_RATE_CV),
+            "opponent": (opponent_score / hours, opponent_score / hours * DEFAULT_RATE_CV)
+        }
+        source = "war averages (not enough log history)"
+
+    return {
+        "your_mean": rates["your"][0], "your_sd": rates["your"][1],
+        "opponent_mean": rates["opponent"][0], "opponent_sd": rates["opponent"][1],
+        "source": source
+    }
+
+
+def simulate_war(current_hour: float, your_score: float, opponent_score: float, starting_goal: float,
+                 rates: dict, paths: int = WAR_SIM_PATHS, budget: float = WAR_SIM_BUDGET,
+                 seed: Optional[int] = None) -> dict:
+    """
+    Simulate `paths` futures of the war within `budget` seconds of wall time.
+    Paths still running when the budget or MAX_SIM_HOURS runs out are reported
+    as unresolved rather than guessed.
+    """
+    import numpy as np
+
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+
+    lead = np.full(paths, float(your_score - opponent_score))
+    end_hour = np.full(paths, np.inf)
+    final_lead = np.full(paths, np.nan)
+    active = np.ones(paths, dtype=bool)
+
+    # Already over (e.g. a stale snapshot): every path ends now
+    if abs(lead[0]) >= decayed_target(starting_goal, current_hour):
+        end_hour[:] = current_hour
+        final_lead[:] = lead
+        active[:] = False
+
+    fan_hours = [current_hour]
+    fan = [np.percentile(lead[:FAN_PATHS], FAN_PERCENTILES)]
+    hour = current_hour
+    truncated = False
+
+    while active.any() and hour < current_hour + MAX_SIM_HOURS:
+        if time.perf_counter() - started > budget:
+            truncated = True
+            break
+
+        idx = np.flatnonzero(active)
+        ours = np.maximum(rng.normal(rates["your_mean"], rates["your_sd"], idx.size), 0)
+        theirs = np.maximum(rng.normal(rates["opponent_mean"], rates["opponent_sd"], idx.size), 0)
+        start_lead = lead[idx]
+        next_lead = start_lead + ours - theirs
+
+        # Within the hour the lead moves linearly; find where |lead| first meets the target
+        start_short = decayed_target(starting_goal, hour) - np.abs(start_lead)
+        end_short = decayed_target(starting_goal, hour + 1) - np.abs(next_lead)
+        crossed = end_short <= 0
+        fraction = np.clip(start_short / np.where(crossed, start_short - end_short, 1), 0, 1)
+
+        done = idx[crossed]
+        end_hour[done] = hour + fraction[crossed]
+        final_lead[done] = (start_lead + fraction * (next_lead - start_lead))[crossed]
+        active[done] = False
+        lead[idx] = next_lead
+        hour += 1
+
+        shown = lead[:FAN_PATHS]
+        fan_hours.append(hour)
+        fan.append(np.percentile(np.where(active[:FAN_PATHS], shown, final_lead[:FAN_PATHS]), FAN_PERCENTILES))
+
+    resolved = np.isfinite(end_hour)
+    wins = int(np.count_nonzero(final_lead[resolved] > 0))
+    resolved_count = int(resolved.sum())
+    end_percentiles = (
+        dict(zip(FAN_PERCENTILES, np.percentile(end_hour[resolved], FAN_PERCENTILES).tolist()))
+        if resolved_count else {}
+    )
+
+    # Past the 95th percentile end time the fan is just flat lines of finished wars
+    fan_hours = np.array(fan_hours)
+    shown = fan_hours <= math.ceil(end_percentiles[95]) + 1 if end_percentiles else slice(None)
+
+    return {
+        "paths": paths,
+        "resolved": resolved_count,
+        "win_probability": wins / resolved_count if resolved_count else float("nan"),
+        "end_hour_percentiles": end_percentiles,
+        "fan_hours": fan_hours[shown],
+        "fan": np.array(fan)[shown],  # shape (hours, len(FAN_PERCENTILES))
+        "truncated": truncated,
+        "elapsed": time.perf_counter() - started
+    }
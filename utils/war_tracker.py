@@ -0,0 +1,221 @@
+"""
+Live ranked war tracker.
+
+A background loop samples the ranked war every WAR_POLL_SECONDS. Each faction's
+scoring rate is kept two ways, both updated in O(1) per sample: an EWMA that
+accounts for uneven sample spacing, and the plain rate over a sliding window.
+The latest prediction is recomputed after every sample and held in memory, so
+/autopredict answers without an API call and the pinned war status message
+keeps itself current.
+"""
+import math
+import time
+from collections import deque
+from typing import Optional
+
+import discord
+from discord.ext import tasks
+
+from constants import WAR_POLL_SECONDS, WAR_RATE_HALF_LIFE, WAR_RATE_WINDOW, WAR_STATUS_CHANNEL, get_api_key
+from utils.predictor import fetch_v2_war_data, solve_war_end_at_rate, TARGET_DECAY, DECAY_START_HOUR
+from utils.storage import get_setting, set_setting
+from utils.war_archive import record_war_sample
+
+STATUS_MESSAGE_SETTING = "war_status_message"
+# The live prediction is only trusted while the war data behind it is this fresh (seconds)
+MAX_TRACKER_AGE = WAR_POLL_SECONDS * 3
+
+
+class RateEstimator:
+    """Points-per-hour rate of one faction's score, from samples at arbitrary spacing."""
+
+    def __init__(self, half_life: float = WAR_RATE_HALF_LIFE, window: float = WAR_RATE_WINDOW):
+        self.half_life = half_life
+        self.window = window
+        self.ewma = None
+        self._samples = deque()  # (hour, score) within the window
+
+    def update(self, hour: float, score: float):
+        if self._samples:
+            last_hour, last_score = self._samples[-1]
+            dt = hour - last_hour
+            if dt <= 0:
+                return
+            rate = (score - last_score) / dt
+            # The weight depends on the gap, so a late or missed sample counts for its real length
+            alpha = 1 - math.exp(-dt * math.log(2) / self.half_life)
+            self.ewma = rate if self.ewma is None else self.ewma + alpha * (rate - self.ewma)
+
+        self._samples.append((hour, score))
+        while len(self._samples) > 2 and self._samples[1][0] <= hour - self.window:
+            self._samples.popleft()
+
+    @property
+    def windowed(self) -> Optional[float]:
+        if len(self._samples) < 2:
+            return None
+        (first_hour, first_score), (last_hour, last_score) = self._samples[0], self._samples[-1]
+        return (last_score - first_score) / (last_hour - first_hour)
+
+
+class WarTracker:
+    """In-memory state of the current ranked war and its latest prediction."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.war_id = None
+        self.data = None
+        self.updated_at = 0.0
+        self.hour = 0.0
+        self.starting_goal = None
+        self.prediction = None
+        self.rates = {"your": RateEstimator(), "opponent": RateEstimator()}
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.updated_at
+
+    @property
+    def fresh(self) -> bool:
+        return self.data is not None and self.age <= MAX_TRACKER_AGE
+
+    def update(self, data: dict, now: Optional[float] = None) -> dict:
+        """Fold in one fetch_v2_war_data sample and refresh the prediction."""
+        now = now or time.time()
+        if data["war_id"] != self.war_id:
+            self.clear()
+            self.war_id = data["war_id"]
+
+        # fetch_v2_war_data rounds the hour to 6 minutes; the rates need the exact one
+        self.hour = (now - data["start"]) / 3600
+        opponent_score = data["your_score"] - data["current_lead"]
+        self.rates["your"].update(self.hour, data["your_score"])
+        self.rates["opponent"].update(self.hour, opponent_score)
+
+        # The API reports the already-decayed target; undo the whole hours of decay
+        decay_hours = max(0, math.floor(self.hour - DECAY_START_HOUR))
+        self.starting_goal = round(data["current_target"] / TARGET_DECAY ** decay_hours)
+
+        self.data = data
+        self.updated_at = now
+        self.prediction = self.predict(self.starting_goal)
+        return self.prediction
+
+    def lead_rates(self) -> dict:
+        """Per-faction rates (points/hour): EWMA, else the window, else the war average."""
+        rates = {}
+        scores = {"your": self.data["your_score"], "opponent": self.data["your_score"] - self.data["current_lead"]}
+        for side, estimator in self.rates.items():
+            if estimator.ewma is not None:
+                rates[side] = estimator.ewma
+            elif estimator.windowed is not None:
+                rates[side] = estimator.windowed
+            else:
+                rates[side] = scores[side] / self.hour if self.hour > 0 else 0.0
+        return rates
+
+    def predict(self, starting_goal: int) -> dict:
+        """predict_war_end-shaped result at the tracked rates; end_hour is inf if the war never settles."""
+        rates = self.lead_rates()
+        lead = self.data["current_lead"]
+        end_hour = float(solve_war_end_at_rate(self.hour, lead, rates["your"] - rates["opponent"], starting_goal))
+        hours_remaining = end_hour - self.hour
+
+        result = {
+            "starting_goal": starting_goal,
+            "current_hour": round(self.hour, 2),
+            "war_end_hour": round(end_hour, 2),
+            "hours_remaining": round(hours_remaining, 2),
+            "your_rate": rates["your"],
+            "opponent_rate": rates["opponent"],
+        }
+        if math.isfinite(end_hour):
+            your_final = self.data["your_score"] + rates["your"] * hours_remaining
+            opponent_final = self.data["your_score"] - lead + rates["opponent"] * hours_remaining
+            result.update(
+                your_final_score=int(your_final),
+                opponent_final_score=int(opponent_final),
+                final_lead=int(your_final - opponent_final)
+            )
+        return result
+
+    def status_text(self) -> str:
+        data, prediction = self.data, self.prediction
+        your, opponent = data["factions"]
+        windowed = {side: estimator.windowed for side, estimator in self.rates.items()}
+        lines = [
+            f"⚔️ **Live War: {your} vs {opponent}** (war {self.war_id})",
+            f"🕓 Hour **{self.hour:.1f}** | Score **{data['your_score']:n}** | Lead **{data['current_lead']:n}** "
+            f"| Target **{data['current_target']:n}** (from {self.starting_goal:n})",
+            f"📈 Rates/hour — You: {prediction['your_rate']:.0f} | Opponent: {prediction['opponent_rate']:.0f}"
+            + (
+                f" (last {WAR_RATE_WINDOW:g}h: {windowed['your']:.0f} | {windowed['opponent']:.0f})"
+                if None not in windowed.values() else ""
+            ),
+        ]
+        if math.isfinite(prediction["war_end_hour"]):
+            winner = "You" if prediction["final_lead"] > 0 else opponent
+            lines.append(
+                f"📅 Predicted end at hour **{prediction['war_end_hour']}** (in {prediction['hours_remaining']}h) "
+                f"| 🏁 {winner} by **{abs(prediction['final_lead']):n}**"
+            )
+        else:
+            lines.append("📅 At the current rates the war does not settle within 1000 hours.")
+        lines.append(f"🔄 Updated <t:{int(self.updated_at)}:R>")
+        return "\n".join(lines)
+
+
+war_tracker = WarTracker()
+
+
+async def update_status_message(bot):
+    """Edit the pinned status message in place, posting (and pinning) a new one if it is gone."""
+    channel = discord.utils.get(bot.get_all_channels(), name=WAR_STATUS_CHANNEL)
+    if not channel:
+        return
+
+    content = war_tracker.status_text()
+    saved = get_setting(STATUS_MESSAGE_SETTING)
+    if saved and saved["channel_id"] == channel.id:
+        try:
+            message = channel.get_partial_message(saved["message_id"])
+            await message.edit(content=content)
+            return
+        except discord.NotFound:
+            pass
+
+    message = await channel.send(content)
+    set_setting(STATUS_MESSAGE_SETTING, {"channel_id": channel.id, "message_id": message.id})
+    try:
+        await message.pin()
+    except discord.HTTPException as e:
+        print(f"⚠️ Could not pin the war status message: {e}")
+
+
+@tasks.loop(seconds=WAR_POLL_SECONDS)
+async def war_tracker_loop(bot):
+    await bot.wait_until_ready()
+
+    if not get_api_key("war"):
+        return
+
+    try:
+        data = await fetch_v2_war_data(max_age=WAR_POLL_SECONDS / 2)
+    except ValueError:
+        # No ranked war right now
+        war_tracker.clear()
+        return
+    except Exception as e:
+        print(f"[Error sampling the ranked war] {e}")
+        return
+
+    try:
+        prediction = war_tracker.update(data)
+        data["starting_goal"] = war_tracker.starting_goal
+        end_hour = prediction["war_end_hour"]
+        record_war_sample(data, predicted_end=end_hour if math.isfinite(end_hour) else None)
+        await update_status_message(bot)
+    except Exception as e:
+        print(f"[Error updating the war tracker] {e}")